@@ -1,51 +1,110 @@
 """The SolarEdge Optimizers Data integration."""
-from requests import ConnectTimeout, HTTPError
+import time
+
+from requests import RequestException
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import Platform
 from homeassistant.core import HomeAssistant
 from homeassistant.exceptions import ConfigEntryNotReady
+from homeassistant.helpers.storage import Store
 
 # AJT: 10-Jan-2025: Changed from absolute import to relative import to use local solaredgeoptimizers.py instead of site-packages version
 from .solaredgeoptimizers import solaredgeoptimizers
 from .const import (
     DOMAIN,
     LOGGER,
+    PRIORITY_INTERACTIVE,
+    PRIORITY_REFRESH,
+    REQUEST_TIMEOUT,
+    ALERTS_STORAGE_KEY,
+    STORAGE_KEY,
+    STORAGE_VERSION,
 )
+from .alerts import SolarEdgeAlertCoordinator
 from .coordinator import MyCoordinator
+from .exporter import async_setup_exporters
 
-PLATFORMS: list[Platform] = [Platform.SENSOR]
+PLATFORMS: list[Platform] = [Platform.SENSOR, Platform.BINARY_SENSOR]
 
 
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Set up SolarEdge Optimizers Data from a config entry."""
+    # Duration of every step of the setup, in seconds
+    timings = {}
+    start = step = time.monotonic()
+
+    def timed(name):
+        nonlocal step
+        now = time.monotonic()
+        timings[name] = round(now - step, 3)
+        step = now
 
     api = solaredgeoptimizers(
-        entry.data["siteid"], entry.data["username"], entry.data["password"]
+        entry.data["siteid"],
+        entry.data["username"],
+        entry.data["password"],
+        timeout=REQUEST_TIMEOUT,
     )
-    try:
-        http_result_code = await hass.async_add_executor_job(api.check_login)
-    except (ConnectTimeout, HTTPError) as ex:
-        LOGGER.error("Could not retrieve details from SolarEdge API")
-        raise ConfigEntryNotReady from ex
-
-    if http_result_code != 200:
-        LOGGER.error("Missing details data in SolarEdge response")
-        raise ConfigEntryNotReady
 
     hass.data.setdefault(DOMAIN, {})
 
     # AJT: 10-Jan-2025: Pass config_entry to coordinator to enable async_config_entry_first_refresh()
     coordinator = MyCoordinator(hass, api, True, entry)
 
-    # Fetch initial data so we have data when entities subscribe
-    #
-    # If the refresh fails, async_config_entry_first_refresh will
-    # raise ConfigEntryNotReady and setup will try again later
-    await coordinator.async_config_entry_first_refresh()
+    restored = await coordinator.async_restore_snapshot()
+    timed("restore_snapshot")
+    if restored:
+        # Warm start: the entities get the stored data right away and the
+        # fresh data follows in the background
+        entry.async_create_background_task(
+            hass, coordinator.async_refresh(), "solaredgeoptimizers warm start refresh"
+        )
+    else:
+        # check_login downloads the layout, the first refresh reuses it
+        try:
+            http_result_code = await coordinator.executor.async_run(
+                PRIORITY_INTERACTIVE, api.check_login
+            )
+        except RequestException as ex:
+            # Also connection errors, read timeouts and DeadlineExceeded of a slow portal
+            LOGGER.error("Could not retrieve details from SolarEdge API")
+            raise ConfigEntryNotReady from ex
+
+        if http_result_code != 200:
+            LOGGER.error("Missing details data in SolarEdge response")
+            raise ConfigEntryNotReady
+        timed("login")
+
+        # Fetch initial data so we have data when entities subscribe
+        #
+        # If the refresh fails, async_config_entry_first_refresh will
+        # raise ConfigEntryNotReady and setup will try again later
+        await coordinator.async_config_entry_first_refresh()
+        timed("first_refresh")
 
     hass.data[DOMAIN][entry.entry_id] = coordinator
 
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
+    timed("platforms")
+
+    # Changed options (deadbands) are applied by reloading the entry
+    entry.async_on_unload(entry.add_update_listener(async_reload_entry))
+
+    # Every refresh is also pushed to the configured exporters, if any
+    coordinator.exporters = async_setup_exporters(hass, entry, coordinator)
+
+    # Alerts are polled on their own cadence and only surface as events, so
+    # keep the alert coordinator polling with a listener of its own
+    alert_coordinator = SolarEdgeAlertCoordinator(hass, api, entry)
+    coordinator.alert_coordinator = alert_coordinator
+    entry.async_on_unload(alert_coordinator.async_add_listener(lambda: None))
+    entry.async_create_background_task(
+        hass, alert_coordinator.async_refresh(), "solaredgeoptimizers alerts refresh"
+    )
+
+    timings["total"] = round(time.monotonic() - start, 3)
+    coordinator.setup_timings = timings
+    LOGGER.info("Setup of SolarEdge site %s took %s seconds: %s", entry.data["siteid"], timings["total"], timings)
 
     return True
 
@@ -55,8 +114,23 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     if unload_ok := await hass.config_entries.async_unload_platforms(entry, PLATFORMS):
         # AJT: 11-Jan-2026: Added cleanup of coordinator resources
         coordinator = hass.data[DOMAIN].pop(entry.entry_id, None)
-        # Future: If API gets a close() method, call it here
-        # if coordinator and hasattr(coordinator, 'my_api'):
-        #     await hass.async_add_executor_job(coordinator.my_api.close)
+        if coordinator is not None:
+            # A delayed write could otherwise run after a reload restored the
+            # snapshot, or recreate it after the entry is removed
+            await coordinator.async_save_snapshot()
+            await coordinator.executor.async_run(
+                PRIORITY_REFRESH, coordinator.my_api.close
+            )
 
     return unload_ok
+
+
+async def async_reload_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Reload a config entry after its options changed."""
+    await hass.config_entries.async_reload(entry.entry_id)
+
+
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Remove the stored snapshot and alerts when a config entry is removed."""
+    await Store(hass, STORAGE_VERSION, STORAGE_KEY.format(entry.entry_id)).async_remove()
+    await Store(hass, STORAGE_VERSION, ALERTS_STORAGE_KEY.format(entry.entry_id)).async_remove()
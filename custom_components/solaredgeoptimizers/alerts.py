@@ -0,0 +1,125 @@
+"""Polling of the alerts of a SolarEdge site."""
+from functools import partial
+
+import logging
+import async_timeout
+
+from homeassistant.helpers.storage import Store
+from homeassistant.helpers.update_coordinator import (
+    DataUpdateCoordinator,
+    UpdateFailed,
+)
+
+from .const import (
+    ALERT_UPDATE_DELAY,
+    ALERTS_STORAGE_KEY,
+    EVENT_ALERT,
+    PRIORITY_BACKGROUND,
+    STORAGE_VERSION,
+)
+from .executor import async_get_executor
+from .solaredgeoptimizers import (
+    SolarEdgeAlert,
+    solaredgeoptimizers,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+ALERT_NEW = "new"
+ALERT_CHANGED = "changed"
+ALERT_RESOLVED = "resolved"
+
+
+class SolarEdgeAlertCoordinator(DataUpdateCoordinator):
+    """Poll the open alerts of the site and fire an event for every difference.
+
+    An index of alert key (see SolarEdgeAlert.key) to fingerprint is kept between
+    polls, so every poll only fires events for alerts that are new, changed or no
+    longer open (resolved). The open alerts are stored, so alerts that opened or
+    resolved while Home Assistant was stopped also fire events. Only the first poll
+    of a new entry just fills the index.
+    """
+
+    def __init__(self, hass, my_api: solaredgeoptimizers, config_entry):
+        super().__init__(
+            hass,
+            _LOGGER,
+            name="SolarEdgeAlerts",
+            update_interval=ALERT_UPDATE_DELAY,
+            config_entry=config_entry,
+        )
+        self.my_api = my_api
+        self._index = {}
+        # Open alerts of the last poll, restored from the store before the first poll
+        self._previous = None
+        self._baseline = True
+        self._store = Store(
+            hass, STORAGE_VERSION, ALERTS_STORAGE_KEY.format(config_entry.entry_id)
+        )
+
+    async def _async_restore(self) -> None:
+        """Restore the open alerts of the last poll of a previous run, if any."""
+        self._previous = {}
+        stored = await self._store.async_load()
+        if stored is None:
+            return
+        try:
+            alerts = [SolarEdgeAlert(json_obj) for json_obj in stored["alerts"]]
+        except (AttributeError, KeyError, TypeError) as err:
+            _LOGGER.warning("Ignoring stored alerts that could not be restored: %s", err)
+            return
+        self._previous = {alert.key(): alert for alert in alerts}
+        self._index = {key: alert.fingerprint() for key, alert in self._previous.items()}
+        self._baseline = False
+
+    async def _async_update_data(self):
+        """Fetch the open alerts and fire events for the differences."""
+        if self._previous is None:
+            await self._async_restore()
+
+        try:
+            async with async_timeout.timeout(120):
+                alerts = await async_get_executor(self.hass).async_run(
+                    PRIORITY_BACKGROUND,
+                    partial(self.my_api.requestAlerts, only_open=True),
+                )
+        except Exception as err:
+            _LOGGER.debug("Error while requesting alerts: %s", err)
+            raise UpdateFailed(err) from err
+
+        previous = self._previous
+        current = {alert.key(): alert for alert in alerts}
+
+        changes = []
+        for key, alert in current.items():
+            fingerprint = alert.fingerprint()
+            known = self._index.get(key)
+            if known == fingerprint:
+                continue
+            self._index[key] = fingerprint
+            changes.append((ALERT_NEW if known is None else ALERT_CHANGED, alert))
+
+        for key in self._index.keys() - current.keys():
+            del self._index[key]
+            if key in previous:
+                changes.append((ALERT_RESOLVED, previous[key]))
+
+        if self._baseline:
+            _LOGGER.debug("Site has %s open alerts", len(current))
+        else:
+            for action, alert in changes:
+                _LOGGER.debug("Alert %s %s", alert.key(), action)
+                self.hass.bus.async_fire(
+                    EVENT_ALERT,
+                    {"action": action, "site_id": self.my_api.siteid, **alert.toDict()},
+                )
+
+        self._previous = current
+        if changes or self._baseline:
+            await self._store.async_save({"alerts": [alert.toJson() for alert in current.values()]})
+        self._baseline = False
+        return current
+
+    def report(self):
+        """Return the open alerts for diagnostics."""
+        return [alert.toDict() for alert in (self.data or {}).values()]
@@ -0,0 +1,199 @@
+"""Underperforming panel detection for the SolarEdge Optimizers Data integration."""
+from __future__ import annotations
+
+import logging
+import warnings
+
+import numpy as np
+
+from .const import (
+    ANALYSIS_MIN_SAMPLES,
+    ANALYSIS_MIN_STRING_POWER,
+    ANALYSIS_MIN_STRING_SIZE,
+    ANALYSIS_PERSISTENCE,
+    ANALYSIS_THRESHOLD,
+    ANALYSIS_WINDOW,
+)
+from .solaredgeoptimizers import measurementOrNan
+
+_LOGGER = logging.getLogger(__name__)
+
+# Scale factor that makes the MAD a consistent estimator of the standard deviation
+MAD_SCALE = 1.4826
+
+# Lower bounds for the spread of a string, so a string of (almost) identical
+# panels does not turn a 1 W difference into a huge score.
+POWER_REL_FLOOR = 0.05
+POWER_ABS_FLOOR = 1.0
+VOLTAGE_REL_FLOOR = 0.02
+VOLTAGE_ABS_FLOOR = 0.5
+
+
+def _robust_scores(values, rel_floor, abs_floor):
+    """Return median, MAD and robust z-scores per row of a (samples, panels) array."""
+    median = np.nanmedian(values, axis=1, keepdims=True)
+    mad = np.nanmedian(np.abs(values - median), axis=1, keepdims=True)
+    scale = np.maximum(
+        MAD_SCALE * mad, np.maximum(np.abs(median) * rel_floor, abs_floor)
+    )
+    return median, mad, (values - median) / scale
+
+
+class StringPerformanceAnalyzer:
+    """Flag optimizers that persistently deviate from the other panels on their string.
+
+    Power and voltage samples of all optimizers are kept in a rolling window, one
+    row per refresh and one column per optimizer, with the columns grouped by
+    string. For every row the median and MAD of each string are computed and every
+    optimizer gets a robust z-score against its own string.
+
+    This class does blocking numpy work and is meant to run in the executor.
+    """
+
+    def __init__(
+        self,
+        window=ANALYSIS_WINDOW,
+        min_samples=ANALYSIS_MIN_SAMPLES,
+        threshold=ANALYSIS_THRESHOLD,
+        persistence=ANALYSIS_PERSISTENCE,
+        min_string_size=ANALYSIS_MIN_STRING_SIZE,
+        min_string_power=ANALYSIS_MIN_STRING_POWER,
+    ):
+        self.window = window
+        self.min_samples = min_samples
+        self.threshold = threshold
+        self.persistence = persistence
+        self.min_string_size = min_string_size
+        self.min_string_power = min_string_power
+
+        self._ids = []
+        self._columns = {}
+        self._strings = []
+        self._power = np.full((window, 0), np.nan)
+        self._voltage = np.full((window, 0), np.nan)
+        self._row = 0
+        self._count = 0
+
+        self.results = {}
+
+    def set_layout(self, site):
+        """(Re)build the columns from a SolarEdgeSite, keeping history of known optimizers."""
+        ids = []
+        strings = []
+        for inverter in site.inverters:
+            for string in inverter.strings:
+                start = len(ids)
+                ids.extend(optimizer.optimizerId for optimizer in string.optimizers)
+                strings.append((string.stringId, start, len(ids)))
+
+        power = np.full((self.window, len(ids)), np.nan)
+        voltage = np.full((self.window, len(ids)), np.nan)
+        for column, optimizer_id in enumerate(ids):
+            old = self._columns.get(optimizer_id)
+            if old is not None:
+                power[:, column] = self._power[:, old]
+                voltage[:, column] = self._voltage[:, old]
+
+        self._ids = ids
+        self._columns = {optimizer_id: i for i, optimizer_id in enumerate(ids)}
+        self._strings = strings
+        self._power = power
+        self._voltage = voltage
+
+        _LOGGER.debug(
+            "Analyzing %s optimizers on %s strings", len(ids), len(strings)
+        )
+
+    def update(self, data):
+        """Add a sample for every optimizer in data and re-evaluate all strings."""
+        power = np.full(len(self._ids), np.nan)
+        voltage = np.full(len(self._ids), np.nan)
+        for item in data:
+            column = self._columns.get(item.paneel_id)
+            if column is not None:
+                power[column] = measurementOrNan(item.power)
+                voltage[column] = measurementOrNan(item.voltage)
+
+        self._power[self._row] = power
+        self._voltage[self._row] = voltage
+        latest = self._row
+        self._row = (self._row + 1) % self.window
+        self._count = min(self._count + 1, self.window)
+
+        self.results = self._evaluate(latest)
+        return self.results
+
+    def _evaluate(self, latest):
+        results = {}
+        # Rows [0, count) are filled; their order does not matter for the statistics
+        power = self._power[: self._count]
+        voltage = self._voltage[: self._count]
+
+        with warnings.catch_warnings():
+            # All-NaN slices (night, missing optimizers) are expected here
+            warnings.simplefilter("ignore", category=RuntimeWarning)
+
+            for string_id, start, stop in self._strings:
+                if stop - start < self.min_string_size:
+                    continue
+
+                p_median, p_mad, p_score = _robust_scores(
+                    power[:, start:stop], POWER_REL_FLOOR, POWER_ABS_FLOOR
+                )
+                v_median, v_mad, v_score = _robust_scores(
+                    voltage[:, start:stop], VOLTAGE_REL_FLOOR, VOLTAGE_ABS_FLOOR
+                )
+
+                # Only samples where the string is actually producing count
+                valid = (p_median >= self.min_string_power) & ~np.isnan(p_score)
+                deviates = valid & (
+                    (p_score < -self.threshold) | (v_score < -self.threshold)
+                )
+                valid_samples = valid.sum(axis=0)
+                flagged_samples = deviates.sum(axis=0)
+                underperforming = (valid_samples >= self.min_samples) & (
+                    flagged_samples >= self.persistence * valid_samples
+                )
+
+                for i, optimizer_id in enumerate(self._ids[start:stop]):
+                    results[optimizer_id] = {
+                        "string_id": string_id,
+                        "underperforming": bool(underperforming[i]),
+                        "valid_samples": int(valid_samples[i]),
+                        "flagged_samples": int(flagged_samples[i]),
+                        "power": _rounded(power[latest, start + i]),
+                        "power_score": _rounded(p_score[latest, i]),
+                        "string_power_median": _rounded(p_median[latest, 0]),
+                        "string_power_mad": _rounded(p_mad[latest, 0]),
+                        "voltage": _rounded(voltage[latest, start + i]),
+                        "voltage_score": _rounded(v_score[latest, i]),
+                        "string_voltage_median": _rounded(v_median[latest, 0]),
+                        "string_voltage_mad": _rounded(v_mad[latest, 0]),
+                    }
+
+        return results
+
+    def report(self):
+        """Return the current state of the analysis for diagnostics."""
+        return {
+            "window": self.window,
+            "samples": self._count,
+            "threshold": self.threshold,
+            "persistence": self.persistence,
+            "min_string_power": self.min_string_power,
+            "strings": len(self._strings),
+            "optimizers": len(self._ids),
+            "underperforming": [
+                optimizer_id
+                for optimizer_id, result in self.results.items()
+                if result["underperforming"]
+            ],
+            "results": {
+                str(optimizer_id): result
+                for optimizer_id, result in self.results.items()
+            },
+        }
+
+
+def _rounded(value):
+    return None if np.isnan(value) else round(float(value), 3)
@@ -0,0 +1,98 @@
+"""Binary sensors flagging underperforming optimizers."""
+from homeassistant.components.binary_sensor import (
+    BinarySensorDeviceClass,
+    BinarySensorEntity,
+)
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.entity_platform import AddEntitiesCallback
+from homeassistant.helpers.update_coordinator import CoordinatorEntity
+
+import logging
+
+from .const import (
+    DOMAIN,
+    BINARY_SENSOR_TYPE_UNDERPERFORMING,
+)
+from .coordinator import MyCoordinator
+from .solaredgeoptimizers import (
+    SolarEdgeOptimizerData,
+    SolarlEdgeOptimizer,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+
+async def async_setup_entry(
+    hass: HomeAssistant,
+    entry: ConfigEntry,
+    async_add_entities: AddEntitiesCallback,
+) -> None:
+    """Add the underperforming binary sensors for a SolarEdge entry."""
+    coordinator: MyCoordinator = hass.data[DOMAIN][entry.entry_id]
+
+    @callback
+    def add_optimizers(optimizers) -> None:
+        entities = [
+            SolarEdgeOptimizerUnderperformingSensor(coordinator, info, optimizer, inverter)
+            for inverter, optimizer, info in optimizers
+        ]
+        _LOGGER.info("Adding %s underperforming binary sensors", len(entities))
+        async_add_entities(entities)
+
+    add_optimizers(coordinator.known_optimizers())
+    entry.async_on_unload(coordinator.async_add_layout_listener(add_optimizers))
+
+
+class SolarEdgeOptimizerUnderperformingSensor(CoordinatorEntity, BinarySensorEntity):
+    """On when an optimizer persistently produces less than the rest of its string."""
+
+    _attr_device_class = BinarySensorDeviceClass.PROBLEM
+
+    def __init__(
+        self,
+        coordinator: MyCoordinator,
+        paneel: SolarEdgeOptimizerData,
+        optimizer: SolarlEdgeOptimizer,
+        inverter,
+    ) -> None:
+        super().__init__(coordinator)
+        self._paneelobject = paneel
+        self._optimizerobject = optimizer
+        self._inverter = inverter
+        self._attr_unique_id = "{}_{}".format(
+            paneel.serialnumber, BINARY_SENSOR_TYPE_UNDERPERFORMING
+        )
+        self._attr_name = "{}_{}".format(
+            BINARY_SENSOR_TYPE_UNDERPERFORMING, optimizer.displayName
+        )
+        self._update_from_analysis()
+
+    @property
+    def device_info(self):
+        return {
+            "identifiers": {(DOMAIN, self._paneelobject.serialnumber)},
+            "name": self._optimizerobject.displayName,
+            "manufacturer": self._paneelobject.manufacturer,
+            "model": self._paneelobject.model,
+            "hw_version": self._paneelobject.serialnumber,
+            "via_device": (DOMAIN, self._inverter.serialNumber),
+        }
+
+    def _update_from_analysis(self) -> None:
+        result = self.coordinator.analyzer.results.get(self._paneelobject.paneel_id)
+        if result is None:
+            self._attr_is_on = None
+            self._attr_extra_state_attributes = {}
+            return
+
+        self._attr_is_on = result["underperforming"]
+        self._attr_extra_state_attributes = {
+            key: value for key, value in result.items() if key != "underperforming"
+        }
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Handle updated analysis results from the coordinator."""
+        self._update_from_analysis()
+        self.async_write_ha_state()
@@ -5,13 +5,24 @@ import logging
 from typing import Any
 
 import voluptuous as vol
+from requests import RequestException
 
 from homeassistant import config_entries
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.data_entry_flow import FlowResult
 from homeassistant.exceptions import HomeAssistantError
 
-from .const import DOMAIN
+from .const import (
+    DOMAIN,
+    CONF_EXPORT_INFLUX_TOKEN,
+    CONF_EXPORT_INFLUX_URL,
+    CONF_EXPORT_MQTT_TOPIC,
+    DEADBAND_OPTIONS,
+    DEFAULT_DEADBAND,
+    PRIORITY_INTERACTIVE,
+    REQUEST_TIMEOUT,
+)
+from .executor import async_get_executor
 
 # AJT: 10-Jan-2025: Changed from absolute import to relative import to use local solaredgeoptimizers.py instead of site-packages version
 from .solaredgeoptimizers import solaredgeoptimizers
@@ -39,10 +50,20 @@ class SolarEdgeWebAuth:
     ) -> bool:
         """Test to check if siteid, username and password are correct."""
         api = solaredgeoptimizers(
-            siteid=self.siteid, username=username, password=password
+            siteid=self.siteid,
+            username=username,
+            password=password,
+            timeout=REQUEST_TIMEOUT,
         )
-        # http_result_code = api.check_login()
-        http_result_code = await hass.async_add_executor_job(api.check_login)
+        # Validation runs ahead of queued refresh and background requests
+        executor = async_get_executor(hass)
+        try:
+            http_result_code = await executor.async_run(PRIORITY_INTERACTIVE, api.check_auth)
+        except RequestException as ex:
+            # Connection errors and timeouts of a slow or unreachable portal
+            raise CannotConnect from ex
+        finally:
+            await executor.async_run(PRIORITY_INTERACTIVE, api.close)
         if http_result_code == 200:
             return True
         else:
@@ -68,6 +89,14 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
 
     VERSION = 1
 
+    @staticmethod
+    @callback
+    def async_get_options_flow(
+        config_entry: config_entries.ConfigEntry,
+    ) -> config_entries.OptionsFlow:
+        """Get the options flow for this handler."""
+        return OptionsFlowHandler()
+
     async def async_step_user(
         self, user_input: dict[str, Any] | None = None
     ) -> FlowResult:
@@ -98,6 +127,40 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
         )
 
 
+class OptionsFlowHandler(config_entries.OptionsFlow):
+    """Handle the deadband and export options of SolarEdge Optimizers Data."""
+
+    async def async_step_init(
+        self, user_input: dict[str, Any] | None = None
+    ) -> FlowResult:
+        """Manage the options."""
+        if user_input is not None:
+            return self.async_create_entry(title="", data=user_input)
+
+        schema = vol.Schema(
+            {
+                vol.Optional(
+                    option,
+                    default=self.config_entry.options.get(option, DEFAULT_DEADBAND),
+                ): vol.All(vol.Coerce(float), vol.Range(min=0))
+                for option in DEADBAND_OPTIONS.values()
+            }
+        ).extend(
+            {
+                vol.Optional(
+                    option,
+                    default=self.config_entry.options.get(option, ""),
+                ): str
+                for option in (
+                    CONF_EXPORT_INFLUX_URL,
+                    CONF_EXPORT_INFLUX_TOKEN,
+                    CONF_EXPORT_MQTT_TOPIC,
+                )
+            }
+        )
+        return self.async_show_form(step_id="init", data_schema=schema)
+
+
 class CannotConnect(HomeAssistantError):
     """Error to indicate we cannot connect."""
 
@@ -12,14 +12,43 @@ LOGGER = logging.getLogger(__package__)
 
 UPDATE_DELAY = timedelta(minutes=15)
 
+# (connect, read) timeout in seconds of every request to the portal
+REQUEST_TIMEOUT = (10, 30)
+# A refresh returns what it has after POLL_DEADLINE seconds, POLL_TIMEOUT is the hard limit
+POLL_DEADLINE = 270
+POLL_TIMEOUT = 300
+
 CHECK_TIME_DELTA = timedelta(hours=1, minutes=00)
 
+# Blocking portal requests run in a worker pool of their own, shared by all
+# entries, instead of the executor of Home Assistant. Queued work with a lower
+# priority number runs first.
+DATA_EXECUTOR = DOMAIN + "_executor"
+EXECUTOR_MAX_WORKERS = 4
+PRIORITY_INTERACTIVE = 0
+PRIORITY_REFRESH = 1
+PRIORITY_BACKGROUND = 2
+
+ALERT_UPDATE_DELAY = timedelta(minutes=30)
+EVENT_ALERT = DOMAIN + "_alert"
+
+# Last coordinator snapshot, restored at startup. Formatted with the entry_id.
+STORAGE_KEY = DOMAIN + ".{}"
+# Open alerts of the last alert poll. Formatted with the entry_id.
+ALERTS_STORAGE_KEY = DOMAIN + ".{}.alerts"
+STORAGE_VERSION = 1
+SNAPSHOT_SAVE_DELAY = 30
+
 SENSOR_TYPE_CURRENT = "Current"
 SENSOR_TYPE_OPT_VOLTAGE = "Optimizer_voltage"
 SENSOR_TYPE_POWER = "Power"
 SENSOR_TYPE_VOLTAGE = "Voltage"
 SENSOR_TYPE_ENERGY = "Lifetime_energy"
 SENSOR_TYPE_LASTMEASUREMENT = "Last_Measurement"
+SENSOR_TYPE_AVERAGE_POWER = "Average_power_1h"
+SENSOR_TYPE_ENERGY_TODAY = "Energy_today"
+SENSOR_TYPE_ENERGY_TODAY_ESTIMATE = "Energy_today_estimate"
+SENSOR_TYPE_PEAK_POWER = "Peak_power_today"
 SENSOR_TYPE = [
     SENSOR_TYPE_CURRENT,
     SENSOR_TYPE_OPT_VOLTAGE,
@@ -27,4 +56,51 @@ SENSOR_TYPE = [
     SENSOR_TYPE_VOLTAGE,
     SENSOR_TYPE_ENERGY,
     SENSOR_TYPE_LASTMEASUREMENT,
+    SENSOR_TYPE_AVERAGE_POWER,
+    SENSOR_TYPE_ENERGY_TODAY,
+    SENSOR_TYPE_ENERGY_TODAY_ESTIMATE,
+    SENSOR_TYPE_PEAK_POWER,
 ]
+
+# Recent samples kept per optimizer for the derived sensors. At one sample per
+# refresh SAMPLE_BUFFER_SIZE covers more than a day. Times are in seconds.
+SAMPLE_BUFFER_SIZE = 128
+SAMPLE_AVERAGE_WINDOW = 3600
+SAMPLE_MAX_GAP = 3600
+
+# Options with the deadband per sensor type: a new value is only written to the
+# state machine when it differs more than the deadband from the last written one.
+CONF_DEADBAND_CURRENT = "deadband_current"
+CONF_DEADBAND_OPT_VOLTAGE = "deadband_optimizer_voltage"
+CONF_DEADBAND_POWER = "deadband_power"
+CONF_DEADBAND_VOLTAGE = "deadband_voltage"
+DEFAULT_DEADBAND = 0.0
+DEADBAND_OPTIONS = {
+    SENSOR_TYPE_CURRENT: CONF_DEADBAND_CURRENT,
+    SENSOR_TYPE_OPT_VOLTAGE: CONF_DEADBAND_OPT_VOLTAGE,
+    SENSOR_TYPE_POWER: CONF_DEADBAND_POWER,
+    SENSOR_TYPE_VOLTAGE: CONF_DEADBAND_VOLTAGE,
+}
+
+# Optional export of every refresh to InfluxDB (line protocol) and/or MQTT
+CONF_EXPORT_INFLUX_URL = "export_influx_url"
+CONF_EXPORT_INFLUX_TOKEN = "export_influx_token"
+CONF_EXPORT_MQTT_TOPIC = "export_mqtt_topic"
+# Batches kept while the destination is unavailable, about a day of refreshes
+EXPORT_BUFFER_SIZE = 96
+# Seconds
+EXPORT_RETRY_DELAY = 10
+EXPORT_MAX_RETRY_DELAY = 600
+EXPORT_TIMEOUT = 30
+
+BINARY_SENSOR_TYPE_UNDERPERFORMING = "Underperforming"
+
+# Underperforming panel detection. Every refresh adds one sample per optimizer to
+# a rolling window; an optimizer is flagged when it deviates from the median of
+# its string in at least ANALYSIS_PERSISTENCE of the (daylight) samples.
+ANALYSIS_WINDOW = 8
+ANALYSIS_MIN_SAMPLES = 4
+ANALYSIS_THRESHOLD = 3.5
+ANALYSIS_PERSISTENCE = 0.75
+ANALYSIS_MIN_STRING_SIZE = 3
+ANALYSIS_MIN_STRING_POWER = 20.0
@@ -2,32 +2,64 @@
 from datetime import datetime, timezone
 
 import logging
+import time
 import async_timeout
 
+from homeassistant.core import callback
 from homeassistant.helpers import device_registry as dr
+from homeassistant.helpers.storage import Store
 from homeassistant.helpers.update_coordinator import (
     DataUpdateCoordinator,
     UpdateFailed,
 )
 from homeassistant.util import dt as dt_util
 
+from .analysis import StringPerformanceAnalyzer
+from .energy import DailyEnergyCache
+from .executor import async_get_executor
+from .samples import SampleRing
 from .const import (
     DOMAIN,
     UPDATE_DELAY,
     CHECK_TIME_DELTA,
+    POLL_DEADLINE,
+    POLL_TIMEOUT,
+    PRIORITY_BACKGROUND,
+    PRIORITY_INTERACTIVE,
+    PRIORITY_REFRESH,
+    SNAPSHOT_SAVE_DELAY,
+    STORAGE_KEY,
+    STORAGE_VERSION,
 )
 
 # AJT: 10-Jan-2025: Changed from absolute import to relative import to use local solaredgeoptimizers.py instead of site-packages version
 from .solaredgeoptimizers import (
     solaredgeoptimizers,
+    SolarEdgeOptimizerData,
+    SolarEdgeSite,
 )
 
 _LOGGER = logging.getLogger(__name__)
 
+
+def _layout_signature(site):
+    """Return what identifies the devices of a SolarEdgeSite, to detect layout changes."""
+    return [
+        (
+            inverter.serialNumber,
+            [
+                (string.stringId, [(o.optimizerId, o.serialNumber) for o in string.optimizers])
+                for string in inverter.strings
+            ],
+        )
+        for inverter in site.inverters
+    ]
+
+
 class MyCoordinator(DataUpdateCoordinator):
     """My custom coordinator."""
 
-    def __init__(self, hass, my_api: solaredgeoptimizers, first_boot, config_entry=None):
+    def __init__(self, hass, my_api: solaredgeoptimizers, first_boot, config_entry):
         """Initialize my coordinator."""
         # AJT: 10-Jan-2025: Pass config_entry to parent class to enable async_config_entry_first_refresh()
         super().__init__(
@@ -41,6 +73,320 @@ class MyCoordinator(DataUpdateCoordinator):
         )
         self.my_api = my_api
         self.first_boot = first_boot
+        # Worker pool for the blocking portal requests
+        self.executor = async_get_executor(hass)
+        self.site = None
+        self.analyzer = StringPerformanceAnalyzer()
+        self.alert_coordinator = None
+        self.exporters = []
+        # Duration of the steps of the setup of the entry, in seconds
+        self.setup_timings = {}
+        # Most recent data per optimizer, also filled while a refresh is in progress
+        self.latest = {}
+        self._paneel_listeners = {}
+        self._layout_listeners = []
+        # Optimizers that have entities: optimizerId -> (serial in the layout, serial of the device,
+        # data when the entities were added)
+        self._known = {}
+        # Recent samples per optimizer, for the derived sensors
+        self.samples = {}
+        # Today's Energy history per optimizer
+        self.energy = DailyEnergyCache()
+        # Optimizers without fresh data because the last refresh hit its deadline
+        self.missing = []
+        # Layout fetched by _async_setup, reused by the first refresh
+        self._setup_site = None
+        # Number of sensor states written and suppressed as insignificant
+        self.write_stats = {"written": 0, "suppressed": 0}
+        # Values sensors must never go below (lifetime energy), by unique_id
+        self.guards = {}
+        self._store = Store(
+            hass, STORAGE_VERSION, STORAGE_KEY.format(config_entry.entry_id)
+        )
+
+    async def async_restore_snapshot(self) -> bool:
+        """Restore layout, data and guard values stored by a previous run.
+
+        Returns False when there is no (usable) snapshot, in which case the
+        coordinator needs a regular first refresh.
+        """
+        snapshot = await self._store.async_load()
+        if not snapshot:
+            return False
+
+        try:
+            site = SolarEdgeSite(snapshot["layout"])
+            data = [
+                SolarEdgeOptimizerData.fromSnapshot(values)
+                for values in snapshot["optimizers"]
+            ]
+        except (KeyError, IndexError, TypeError, ValueError) as err:
+            _LOGGER.warning("Ignoring stored snapshot that could not be restored: %s", err)
+            return False
+
+        _LOGGER.info(
+            "Restored %s optimizers from the snapshot of %s",
+            len(data),
+            snapshot.get("saved_at"),
+        )
+        self.guards = snapshot.get("guards", {})
+        try:
+            self.samples = {
+                int(paneel_id): SampleRing.fromSnapshot(rows)
+                for paneel_id, rows in snapshot.get("samples", {}).items()
+            }
+        except (TypeError, ValueError) as err:
+            _LOGGER.warning("Ignoring stored samples that could not be restored: %s", err)
+            self.samples = {}
+        try:
+            self.energy = DailyEnergyCache.fromSnapshot(snapshot.get("energy", {}))
+        except (AttributeError, TypeError, ValueError) as err:
+            _LOGGER.warning("Ignoring stored energy history that could not be restored: %s", err)
+            self.energy = DailyEnergyCache()
+        await self._async_apply_layout(site)
+        self.latest = {info.paneel_id: info for info in data}
+        self._async_reconcile()
+        self.async_set_updated_data(data)
+        return True
+
+    @callback
+    def _async_schedule_save(self) -> None:
+        self._store.async_delay_save(self._snapshot, SNAPSHOT_SAVE_DELAY)
+
+    async def async_save_snapshot(self) -> None:
+        """Write the snapshot now, this also cancels a pending delayed write."""
+        if self.site is not None:
+            await self._store.async_save(self._snapshot())
+
+    @callback
+    def _snapshot(self):
+        return {
+            "saved_at": dt_util.utcnow().isoformat(),
+            "layout": self.site.toJson(),
+            "optimizers": [info.toSnapshot() for info in self.data or []],
+            "guards": self.guards,
+            "samples": {
+                str(paneel_id): ring.toSnapshot()
+                for paneel_id, ring in self.samples.items()
+            },
+            # Energy today is only taken from the portal, also right after a restart
+            "energy": self.energy.toSnapshot(),
+        }
+
+    @callback
+    def async_add_paneel_listener(self, paneel_id, update_callback):
+        """Listen for partial updates of a single optimizer during a refresh."""
+        listeners = self._paneel_listeners.setdefault(paneel_id, [])
+        listeners.append(update_callback)
+
+        @callback
+        def remove_listener() -> None:
+            listeners.remove(update_callback)
+
+        return remove_listener
+
+    @callback
+    def async_add_layout_listener(self, update_callback):
+        """Listen for optimizers that get entities after a change of the layout.
+
+        update_callback is called with a list of (inverter, optimizer, data) tuples.
+        """
+        self._layout_listeners.append(update_callback)
+
+        @callback
+        def remove_listener() -> None:
+            self._layout_listeners.remove(update_callback)
+
+        return remove_listener
+
+    def known_optimizers(self):
+        """Return (inverter, optimizer, data) of every optimizer with entities, in layout order."""
+        return [
+            # self.latest has no entry for optimizers that had no data in the last refresh
+            (
+                inverter,
+                optimizer,
+                self.latest.get(optimizer.optimizerId, self._known[optimizer.optimizerId][2]),
+            )
+            for inverter in self.site.inverters
+            for string in inverter.strings
+            for optimizer in string.optimizers
+            if optimizer.optimizerId in self._known
+        ]
+
+    @callback
+    def _async_reconcile(self) -> None:
+        """Add entities for new optimizers and retire the devices of those that left the layout.
+
+        An optimizer with a new serial number (a replaced panel or optimizer) is
+        retired and added again. New optimizers only get entities once there is
+        data for them; optimizers without fresh data are not retired.
+        """
+        in_layout = {}
+        for inverter in self.site.inverters:
+            for string in inverter.strings:
+                for optimizer in string.optimizers:
+                    in_layout[optimizer.optimizerId] = (inverter, optimizer)
+
+        retired = [
+            paneel_id
+            for paneel_id, (serial, _, _) in self._known.items()
+            if paneel_id not in in_layout or in_layout[paneel_id][1].serialNumber != serial
+        ]
+        for paneel_id in retired:
+            _, device_serial, _ = self._known.pop(paneel_id)
+            _LOGGER.info("Optimizer %s (%s) left the layout", paneel_id, device_serial)
+            self._async_retire_device(device_serial)
+            for unique_id in [key for key in self.guards if key.startswith(device_serial + "_")]:
+                del self.guards[unique_id]
+
+        added = []
+        for paneel_id, (inverter, optimizer) in in_layout.items():
+            info = self.latest.get(paneel_id)
+            if paneel_id in self._known or info is None:
+                continue
+            self._known[paneel_id] = (optimizer.serialNumber, info.serialnumber, info)
+            added.append((inverter, optimizer, info))
+
+        if not added:
+            return
+        _LOGGER.debug("Adding entities for %s optimizers", len(added))
+        for update_callback in list(self._layout_listeners):
+            update_callback(added)
+
+    @callback
+    def _async_retire_device(self, serial) -> None:
+        """Detach the device with serial from this entry, which also removes its entities."""
+        device_registry = dr.async_get(self.hass)
+        device = device_registry.async_get_device(identifiers={(DOMAIN, serial)})
+        if device is not None:
+            device_registry.async_update_device(
+                device.id, remove_config_entry_id=self.config_entry.entry_id
+            )
+
+    def get_paneel(self, paneel_id):
+        """Return the most recent SolarEdgeOptimizerData of an optimizer, or None."""
+        return self.latest.get(paneel_id)
+
+    def get_samples(self, paneel_id):
+        """Return the SampleRing of an optimizer, or None."""
+        return self.samples.get(paneel_id)
+
+    @callback
+    def _record_sample(self, info) -> None:
+        """Add the measurement of info to the sample buffer of its optimizer."""
+        ts = info.lastmeasurement
+        if ts is None:
+            return
+        # SolarEdge returns a *naive* UTC timestamp – tag it as UTC
+        if ts.tzinfo is None:
+            ts = ts.replace(tzinfo=timezone.utc)
+
+        ring = self.samples.get(info.paneel_id)
+        if ring is None:
+            ring = self.samples[info.paneel_id] = SampleRing()
+        ring.push(
+            ts.timestamp(),
+            dt_util.as_local(ts).date().toordinal(),
+            info.power,
+            info.voltage,
+            info.current,
+        )
+
+    @callback
+    def _async_publish_partial(self, records):
+        """Notify only the entities of the optimizers in records."""
+        _LOGGER.debug("Publishing partial update for %s optimizers", len(records))
+        for info in records:
+            self.latest[info.paneel_id] = info
+        for info in records:
+            for update_callback in list(self._paneel_listeners.get(info.paneel_id, ())):
+                update_callback()
+
+    async def _async_fetch_data(self, deadline):
+        """Fetch the data of all optimizers, publishing every string as soon as it is complete.
+
+        The last string is not published separately, it is part of the
+        consolidated update that follows the refresh.
+        """
+        site, self._setup_site = self._setup_site, None
+        # The first refresh goes ahead of the background work of other entries
+        executor = self.executor.with_priority(
+            PRIORITY_INTERACTIVE if self.data is None else PRIORITY_REFRESH
+        )
+        if site is None:
+            site = await self.my_api.arequestListOfAllPanels(deadline, executor)
+        if self.site is None or _layout_signature(site) != _layout_signature(self.site):
+            if self.site is not None:
+                _LOGGER.info("The layout of site %s changed", site.siteId)
+            await self._async_apply_layout(site)
+        else:
+            self.site = site
+
+        string_of = {
+            optimizer.optimizerId: string.stringId
+            for inverter in site.inverters
+            for string in inverter.strings
+            for optimizer in string.optimizers
+        }
+
+        data = []
+        pending = []
+        current_string = None
+        missing = []
+        async for info in self.my_api.aiterAllData(
+            ordered=True,
+            solarsite=site,
+            deadline=deadline,
+            missing=missing,
+            executor=executor,
+        ):
+            string_id = string_of.get(info.paneel_id)
+            if pending and string_id != current_string:
+                self._async_publish_partial(pending)
+                pending = []
+            current_string = string_id
+            self._record_sample(info)
+            pending.append(info)
+            data.append(info)
+
+        if missing:
+            # Better partial data than nothing: keep the last known data of the others
+            _LOGGER.warning(
+                "Refresh deadline reached, keeping the previous data of %s optimizers",
+                len(missing),
+            )
+            data.extend(
+                self.latest[paneel_id] for paneel_id in missing if paneel_id in self.latest
+            )
+        self.missing = missing
+
+        self.latest = {info.paneel_id: info for info in data}
+        return data
+
+    async def _async_fetch_energy_today(self, paneel_ids, deadline) -> None:
+        """Download the Energy history since the last cached point of every optimizer."""
+        starttimes = self.energy.starttimes(paneel_ids, dt_util.start_of_local_day())
+        if not starttimes:
+            return
+
+        missing = []
+        try:
+            # Every item is a request of its own in the worker pool
+            histories = await self.my_api.arequestItemHistories(
+                starttimes,
+                parameter="Energy",
+                deadline=deadline,
+                missing=missing,
+                executor=self.executor.with_priority(PRIORITY_BACKGROUND),
+            )
+        except Exception as err:
+            # Energy today is not worth failing the refresh for
+            _LOGGER.warning("Could not update the energy of today: %s", err)
+            return
+
+        for paneel_id, history in histories.items():
+            self.energy.update(paneel_id, starttimes[paneel_id], history)
 
     async def _async_setup(self) -> None:
         """Set up the coordinator.
@@ -49,15 +395,38 @@ class MyCoordinator(DataUpdateCoordinator):
         only once during the first refresh.
         """
 
-        site = await self.hass.async_add_executor_job(self.my_api.requestListOfAllPanels)
+        # Uses the layout already downloaded by check_login, if any
+        site = await self.my_api.arequestListOfAllPanels(
+            executor=self.executor.with_priority(PRIORITY_INTERACTIVE)
+        )
+        await self._async_apply_layout(site)
+        self._setup_site = site
 
+    async def _async_apply_layout(self, site) -> None:
+        """Register the inverters of site and start analyzing its optimizers."""
         _LOGGER.info("Found all information for site: %s", site.siteId)
         _LOGGER.info("Site has %s inverters", len(site.inverters))
         _LOGGER.info(
             "Adding all optimizers (%s) found to Home Assistant",
             site.returnNumberOfOptimizers(),
         )
-        
+
+        previous, self.site = self.site, site
+        await self.hass.async_add_executor_job(self.analyzer.set_layout, site)
+
+        # Only keep the samples of optimizers that are still in the layout
+        optimizer_ids = {
+            optimizer.optimizerId
+            for inverter in site.inverters
+            for string in inverter.strings
+            for optimizer in string.optimizers
+        }
+        self.samples = {
+            paneel_id: ring
+            for paneel_id, ring in self.samples.items()
+            if paneel_id in optimizer_ids
+        }
+        self.energy.retain(optimizer_ids)
 
         i = 1
         for inverter in site.inverters:
@@ -72,6 +441,13 @@ class MyCoordinator(DataUpdateCoordinator):
                 name=inverter.displayName,
             )
 
+        if previous is not None:
+            serials = {inverter.serialNumber for inverter in site.inverters}
+            for inverter in previous.inverters:
+                if inverter.serialNumber not in serials:
+                    _LOGGER.info("Inverter %s left the layout", inverter.serialNumber)
+                    self._async_retire_device(inverter.serialNumber)
+
     async def _async_update_data(self):
         """Fetch data from API endpoint.
 
@@ -81,10 +457,19 @@ class MyCoordinator(DataUpdateCoordinator):
         try:
             # Note: asyncio.TimeoutError and aiohttp.ClientError are already
             # handled by the data update coordinator.
-            async with async_timeout.timeout(300):
-                _LOGGER.debug("Update from the coordinator")
-                data = await self.hass.async_add_executor_job(
-                    self.my_api.requestAllData
+            async with async_timeout.timeout(POLL_TIMEOUT):
+                _LOGGER.debug(
+                    "Update from the coordinator, sensor states written: %s, suppressed: %s",
+                    self.write_stats["written"],
+                    self.write_stats["suppressed"],
+                )
+                # Every request gets the time that is left until the deadline
+                deadline = time.monotonic() + POLL_DEADLINE
+                data = await self._async_fetch_data(deadline)
+                missing = set(self.missing)
+                await self._async_fetch_energy_today(
+                    [info.paneel_id for info in data if info.paneel_id not in missing],
+                    deadline,
                 )
 
                 update = False
@@ -116,7 +501,18 @@ class MyCoordinator(DataUpdateCoordinator):
                     self.first_boot = False
                 else:
                     _LOGGER.debug("No new measurements within time window, but returning data for cumulative sensors")
-                
+
+                # Look for underperforming panels, off the event loop
+                await self.hass.async_add_executor_job(
+                    self.analyzer.update,
+                    [info for info in data if info.paneel_id not in missing],
+                )
+
+                self._async_reconcile()
+
+                # self.data is only set after we return, save it then
+                self._async_schedule_save()
+
                 return data
 
         except Exception as err:
@@ -0,0 +1,39 @@
+"""Diagnostics support for SolarEdge Optimizers Data."""
+from __future__ import annotations
+
+from typing import Any
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+
+from .const import DOMAIN
+from .coordinator import MyCoordinator
+
+TO_REDACT = {"username", "password", "export_influx_token"}
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, entry: ConfigEntry
+) -> dict[str, Any]:
+    """Return diagnostics for a config entry."""
+    coordinator: MyCoordinator = hass.data[DOMAIN][entry.entry_id]
+
+    return {
+        "entry": async_redact_data(entry.as_dict(), TO_REDACT),
+        "setup_timings": coordinator.setup_timings,
+        "state_writes": coordinator.write_stats,
+        "coalesced_requests": coordinator.my_api.flights.stats,
+        "executor": coordinator.executor.stats(),
+        "missing_optimizers": coordinator.missing,
+        "underperforming_analysis": coordinator.analyzer.report(),
+        "energy_today": coordinator.energy.report(),
+        "exporters": {
+            exporter.name: exporter.report() for exporter in coordinator.exporters
+        },
+        "open_alerts": (
+            coordinator.alert_coordinator.report()
+            if coordinator.alert_coordinator is not None
+            else None
+        ),
+    }
@@ -0,0 +1,96 @@
+"""Energy produced today per optimizer for the SolarEdge Optimizers Data integration."""
+from __future__ import annotations
+
+from datetime import date, datetime
+
+import logging
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class DailyEnergyCache:
+    """Cache the points of today's Energy history per optimizer.
+
+    Every refresh only downloads the history since the last cached point of an
+    optimizer. That point is downloaded again, since its interval may not have
+    been complete, and replaces the cached points from then on. The cache is
+    emptied when the local day changes.
+    """
+
+    def __init__(self):
+        self.day = None
+        self._points = {}
+
+    def starttimes(self, paneel_ids, midnight):
+        """Return the start time of the next download per optimizer.
+
+        midnight is the (aware) start of the current local day.
+        """
+        if midnight.date() != self.day:
+            _LOGGER.debug("New day %s, emptying the energy cache", midnight.date())
+            self.day = midnight.date()
+            self._points = {}
+
+        starttimes = {}
+        for paneel_id in paneel_ids:
+            points = self._points.get(paneel_id)
+            starttimes[paneel_id] = max(points) if points else midnight
+        return starttimes
+
+    def update(self, paneel_id, starttime, history):
+        """Store a downloaded history that starts at starttime."""
+        points = self._points.setdefault(paneel_id, {})
+        for timestamp in [timestamp for timestamp in points if timestamp >= starttime]:
+            del points[timestamp]
+        points.update(
+            (timestamp, value)
+            for timestamp, value in history.items()
+            if timestamp >= starttime and value is not None
+        )
+
+    def energy_today(self, paneel_id, today):
+        """Return the energy (kWh) of an optimizer on the local day today, or None."""
+        if today != self.day or paneel_id not in self._points:
+            return None
+        # The history has the energy in Wh per interval
+        return sum(self._points[paneel_id].values()) / 1000
+
+    def retain(self, paneel_ids):
+        """Forget the optimizers that are not in paneel_ids."""
+        self._points = {
+            paneel_id: points
+            for paneel_id, points in self._points.items()
+            if paneel_id in paneel_ids
+        }
+
+    def toSnapshot(self):
+        """Return the cached points in a JSON serializable form."""
+        return {
+            "day": None if self.day is None else self.day.isoformat(),
+            "points": {
+                str(paneel_id): [[timestamp.isoformat(), value] for timestamp, value in points.items()]
+                for paneel_id, points in self._points.items()
+            },
+        }
+
+    @classmethod
+    def fromSnapshot(cls, snapshot):
+        """Rebuild a DailyEnergyCache from toSnapshot()."""
+        cache = cls()
+        if snapshot.get("day") is not None:
+            cache.day = date.fromisoformat(snapshot["day"])
+        cache._points = {
+            int(paneel_id): {
+                datetime.fromisoformat(timestamp): value for timestamp, value in points
+            }
+            for paneel_id, points in snapshot.get("points", {}).items()
+        }
+        return cache
+
+    def report(self):
+        """Return the state of the cache for diagnostics."""
+        return {
+            "day": None if self.day is None else self.day.isoformat(),
+            "optimizers": len(self._points),
+            "points": sum(len(points) for points in self._points.values()),
+        }
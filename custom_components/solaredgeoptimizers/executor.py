@@ -0,0 +1,201 @@
+"""Dedicated worker pool for the blocking portal requests of the integration."""
+from __future__ import annotations
+
+from concurrent.futures import Executor, Future
+
+import asyncio
+import itertools
+import logging
+import math
+import queue
+import threading
+import time
+
+from homeassistant.const import EVENT_HOMEASSISTANT_STOP
+from homeassistant.core import HomeAssistant, callback
+
+from .const import (
+    DATA_EXECUTOR,
+    EXECUTOR_MAX_WORKERS,
+    PRIORITY_BACKGROUND,
+    PRIORITY_INTERACTIVE,
+    PRIORITY_REFRESH,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+PRIORITY_NAMES = {
+    PRIORITY_INTERACTIVE: "interactive",
+    PRIORITY_REFRESH: "refresh",
+    PRIORITY_BACKGROUND: "background",
+}
+
+
+class PriorityExecutor(Executor):
+    """Bounded thread pool that runs queued work in order of priority.
+
+    Work with a lower priority number runs first, work with the same priority in
+    the order it was submitted. Running work is never interrupted, so interactive
+    work waits at most until a worker becomes free. Threads are started on
+    demand, up to max_workers.
+
+    The number of queued and running jobs and the time jobs waited in the queue
+    are kept per priority, see stats().
+    """
+
+    def __init__(self, max_workers=EXECUTOR_MAX_WORKERS, thread_name_prefix="solaredgeoptimizers"):
+        self.max_workers = max_workers
+        self._thread_name_prefix = thread_name_prefix
+        self._queue = queue.PriorityQueue()
+        self._sequence = itertools.count()
+        self._lock = threading.Lock()
+        self._threads = []
+        # Workers that do not hold a job
+        self._idle = 0
+        self._shutdown = False
+
+        self._running = 0
+        self._queued = dict.fromkeys(PRIORITY_NAMES, 0)
+        self._waits = {
+            priority: {"jobs": 0, "total": 0.0, "max": 0.0, "last": 0.0}
+            for priority in PRIORITY_NAMES
+        }
+
+    def submit(self, fn, /, *args, priority=PRIORITY_REFRESH, **kwargs):
+        future = Future()
+        with self._lock:
+            if self._shutdown:
+                raise RuntimeError("cannot schedule new futures after shutdown")
+            self._queued[priority] += 1
+            self._queue.put(
+                (priority, next(self._sequence), time.monotonic(), future, fn, args, kwargs)
+            )
+            # A worker waiting for work takes one job, start a worker when
+            # there are more queued jobs than waiting workers
+            if (
+                sum(self._queued.values()) > self._idle
+                and len(self._threads) < self.max_workers
+            ):
+                thread = threading.Thread(
+                    target=self._worker,
+                    name="{}_{}".format(self._thread_name_prefix, len(self._threads)),
+                    daemon=True,
+                )
+                self._threads.append(thread)
+                self._idle += 1
+                thread.start()
+        return future
+
+    def with_priority(self, priority) -> Executor:
+        """Return an Executor that submits to this pool with priority."""
+        return _PriorityView(self, priority)
+
+    async def async_run(self, priority, fn, *args):
+        """Run fn(*args) in the pool with priority and return its result."""
+        return await asyncio.wrap_future(self.submit(fn, *args, priority=priority))
+
+    def _worker(self):
+        while True:
+            priority, _, queued_at, future, fn, args, kwargs = self._queue.get()
+            if future is None:
+                # Shutdown
+                return
+
+            waited = time.monotonic() - queued_at
+            with self._lock:
+                # Together, so submit() never sees a job taken by a worker that
+                # still counts as waiting
+                self._idle -= 1
+                self._queued[priority] -= 1
+                wait = self._waits[priority]
+                wait["jobs"] += 1
+                wait["total"] += waited
+                wait["max"] = max(wait["max"], waited)
+                wait["last"] = waited
+                self._running += 1
+
+            try:
+                if not future.set_running_or_notify_cancel():
+                    continue
+                try:
+                    result = fn(*args, **kwargs)
+                except BaseException as e:
+                    future.set_exception(e)
+                else:
+                    future.set_result(result)
+            finally:
+                with self._lock:
+                    self._running -= 1
+                    self._idle += 1
+
+    def shutdown(self, wait=True, *, cancel_futures=False):
+        with self._lock:
+            self._shutdown = True
+            if cancel_futures:
+                while True:
+                    try:
+                        priority, _, _, future, *_ = self._queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    if future is not None:
+                        self._queued[priority] -= 1
+                        future.cancel()
+            # Sorted after all queued work
+            for _ in self._threads:
+                self._queue.put((math.inf, next(self._sequence), 0, None, None, None, None))
+            threads = list(self._threads)
+
+        if wait:
+            for thread in threads:
+                thread.join()
+
+    def stats(self):
+        """Return the queue depth, running jobs and queue wait times (seconds) per priority."""
+        with self._lock:
+            return {
+                "workers": len(self._threads),
+                "max_workers": self.max_workers,
+                "running": self._running,
+                "queued": sum(self._queued.values()),
+                "priorities": {
+                    name: {
+                        "queued": self._queued[priority],
+                        "jobs": self._waits[priority]["jobs"],
+                        "wait_last": round(self._waits[priority]["last"], 3),
+                        "wait_max": round(self._waits[priority]["max"], 3),
+                        "wait_avg": round(
+                            self._waits[priority]["total"] / self._waits[priority]["jobs"], 3
+                        )
+                        if self._waits[priority]["jobs"]
+                        else 0.0,
+                    }
+                    for priority, name in PRIORITY_NAMES.items()
+                },
+            }
+
+
+class _PriorityView(Executor):
+    """Submits to a PriorityExecutor with a fixed priority."""
+
+    def __init__(self, executor: PriorityExecutor, priority):
+        self._executor = executor
+        self._priority = priority
+
+    def submit(self, fn, /, *args, **kwargs):
+        return self._executor.submit(fn, *args, priority=self._priority, **kwargs)
+
+
+@callback
+def async_get_executor(hass: HomeAssistant) -> PriorityExecutor:
+    """Return the worker pool shared by all entries, created on first use."""
+    executor = hass.data.get(DATA_EXECUTOR)
+    if executor is None:
+        executor = hass.data[DATA_EXECUTOR] = PriorityExecutor()
+
+        @callback
+        def shutdown(event) -> None:
+            hass.data.pop(DATA_EXECUTOR, None)
+            executor.shutdown(wait=False, cancel_futures=True)
+
+        hass.bus.async_listen_once(EVENT_HOMEASSISTANT_STOP, shutdown)
+    return executor
@@ -0,0 +1,310 @@
+"""Batched export of optimizer data to InfluxDB and MQTT."""
+from __future__ import annotations
+
+from abc import ABC, abstractmethod
+from collections import deque
+from datetime import timezone
+
+import asyncio
+import json
+import logging
+
+import aiohttp
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
+
+from .const import (
+    CONF_EXPORT_INFLUX_TOKEN,
+    CONF_EXPORT_INFLUX_URL,
+    CONF_EXPORT_MQTT_TOPIC,
+    EXPORT_BUFFER_SIZE,
+    EXPORT_MAX_RETRY_DELAY,
+    EXPORT_RETRY_DELAY,
+    EXPORT_TIMEOUT,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+# Measurement values of SolarEdgeOptimizerData and the field names they are exported as
+FIELDS = (
+    ("power", "power"),
+    ("voltage", "voltage"),
+    ("current", "current"),
+    ("optimizer_voltage", "optimizer_voltage"),
+    ("lifetime_energy", "lifetime_energy"),
+)
+
+
+class PermanentExportError(Exception):
+    """A batch was rejected and retrying it will not help."""
+
+
+class BatchExporter(ABC):
+    """Export every refresh of the coordinator as one batch of messages.
+
+    Batches wait in a bounded buffer and are sent in order by a single
+    background task, which retries a failing message with an exponential
+    backoff. When the destination cannot keep up the buffer fills and the
+    oldest batch is dropped, so the coordinator is never slowed down and the
+    memory use stays bounded.
+
+    Only measurements newer than the last exported measurement of an optimizer
+    are exported, so data carried over from a previous refresh is not sent twice.
+    """
+
+    name = None
+
+    def __init__(self, hass: HomeAssistant, entry: ConfigEntry, buffer_size=EXPORT_BUFFER_SIZE):
+        self.hass = hass
+        self.entry = entry
+        self._buffer = deque()
+        self._buffer_size = buffer_size
+        self._wakeup = asyncio.Event()
+        self._exported = {}
+        self._task = None
+        self.stats = {"batches": 0, "messages": 0, "retries": 0, "rejected": 0, "dropped": 0}
+
+    @callback
+    def async_start(self) -> None:
+        self._task = self.entry.async_create_background_task(
+            self.hass, self._async_run(), "solaredgeoptimizers {} exporter".format(self.name)
+        )
+
+    @callback
+    def async_export(self, site, data) -> None:
+        """Add a batch with the new measurements in data."""
+        fresh = [
+            info
+            for info in data or []
+            if info.lastmeasurement is not None
+            and info.lastmeasurement != self._exported.get(info.paneel_id)
+        ]
+        if not fresh:
+            return
+        for info in fresh:
+            self._exported[info.paneel_id] = info.lastmeasurement
+
+        messages = self.serialize(site, fresh)
+        if not messages:
+            return
+
+        if len(self._buffer) >= self._buffer_size:
+            self._buffer.popleft()
+            self.stats["dropped"] += 1
+            _LOGGER.warning("%s export is falling behind, dropped the oldest batch", self.name)
+        self._buffer.append(deque(messages))
+        self._wakeup.set()
+
+    @abstractmethod
+    def serialize(self, site, data):
+        """Return the messages of a batch."""
+
+    @abstractmethod
+    async def _async_send(self, message) -> None:
+        """Send one message, raise PermanentExportError when retrying will not help."""
+
+    async def _async_run(self) -> None:
+        delay = EXPORT_RETRY_DELAY
+        while True:
+            if not self._buffer:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+
+            batch = self._buffer[0]
+            try:
+                await self._async_send(batch[0])
+            except PermanentExportError as err:
+                _LOGGER.error("%s export rejected a message, skipping it: %s", self.name, err)
+                self.stats["rejected"] += 1
+            except Exception as err:
+                _LOGGER.warning(
+                    "%s export failed, retrying in %s seconds: %s", self.name, delay, err
+                )
+                self.stats["retries"] += 1
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, EXPORT_MAX_RETRY_DELAY)
+                continue
+            else:
+                self.stats["messages"] += 1
+
+            delay = EXPORT_RETRY_DELAY
+            batch.popleft()
+            # The batch may have been dropped while sending
+            if not batch and self._buffer and self._buffer[0] is batch:
+                self._buffer.popleft()
+                self.stats["batches"] += 1
+
+    def report(self):
+        """Return the state of the exporter for diagnostics."""
+        return {**self.stats, "buffered": len(self._buffer)}
+
+
+def _optimizer_names(site):
+    """Return the (inverter, string, optimizer) of every optimizer id in site."""
+    names = {}
+    for inverter in site.inverters:
+        for string in inverter.strings:
+            for optimizer in string.optimizers:
+                names[optimizer.optimizerId] = (inverter, string, optimizer)
+    return names
+
+
+def _timestamp(info):
+    ts = info.lastmeasurement
+    # SolarEdge returns a *naive* UTC timestamp – tag it as UTC
+    if ts.tzinfo is None:
+        ts = ts.replace(tzinfo=timezone.utc)
+    return int(ts.timestamp())
+
+
+def _escape_tag(value):
+    return (
+        str(value)
+        .replace("\\", "\\\\")
+        .replace(",", "\\,")
+        .replace("=", "\\=")
+        .replace(" ", "\\ ")
+    )
+
+
+class InfluxExporter(BatchExporter):
+    """Write every refresh to InfluxDB as one line protocol request.
+
+    The url is the complete write url, including the database or bucket and
+    precision=s, for example http://influxdb:8086/api/v2/write?org=home&bucket=solar&precision=s
+    """
+
+    name = "InfluxDB"
+
+    def __init__(self, hass, entry, url, token=None, **kwargs):
+        super().__init__(hass, entry, **kwargs)
+        self.url = url
+        self.token = token
+
+    def serialize(self, site, data):
+        names = _optimizer_names(site)
+        lines = []
+        for info in data:
+            inverter, string, optimizer = names.get(info.paneel_id, (None, None, None))
+            tags = "solaredge_optimizer,site={},optimizer={}".format(
+                _escape_tag(site.siteId), _escape_tag(info.serialnumber)
+            )
+            if inverter is not None:
+                tags += ",inverter={},string={},name={}".format(
+                    _escape_tag(inverter.serialNumber),
+                    _escape_tag(string.displayName),
+                    _escape_tag(optimizer.displayName),
+                )
+            fields = ",".join(
+                "{}={}".format(field, float(getattr(info, attribute)))
+                for attribute, field in FIELDS
+                if getattr(info, attribute, None) is not None
+            )
+            if fields:
+                lines.append("{} {} {}".format(tags, fields, _timestamp(info)))
+
+        return ["\n".join(lines)] if lines else []
+
+    async def _async_send(self, message) -> None:
+        headers = {"Content-Type": "text/plain; charset=utf-8"}
+        if self.token:
+            headers["Authorization"] = "Token {}".format(self.token)
+
+        session = async_get_clientsession(self.hass)
+        async with session.post(
+            self.url,
+            data=message.encode(),
+            headers=headers,
+            timeout=aiohttp.ClientTimeout(total=EXPORT_TIMEOUT),
+        ) as response:
+            if response.status < 300:
+                return
+            text = await response.text()
+            if response.status == 429 or response.status >= 500:
+                raise aiohttp.ClientResponseError(
+                    response.request_info, (), status=response.status, message=text
+                )
+            raise PermanentExportError("HTTP {}: {}".format(response.status, text))
+
+
+class MqttExporter(BatchExporter):
+    """Publish every refresh as one MQTT message per inverter.
+
+    The messages are published to <topic>/<inverter serial number> with a JSON
+    payload holding the measurements of all optimizers of that inverter.
+    """
+
+    name = "MQTT"
+
+    def __init__(self, hass, entry, topic, **kwargs):
+        super().__init__(hass, entry, **kwargs)
+        self.topic = topic.rstrip("/")
+
+    def serialize(self, site, data):
+        names = _optimizer_names(site)
+        inverters = {}
+        for info in data:
+            inverter, string, optimizer = names.get(info.paneel_id, (None, None, None))
+            key = inverter.serialNumber if inverter is not None else "unknown"
+            inverters.setdefault(key, []).append(
+                {
+                    "optimizer": info.serialnumber,
+                    "name": None if optimizer is None else optimizer.displayName,
+                    "string": None if string is None else string.displayName,
+                    "timestamp": _timestamp(info),
+                    **{
+                        field: getattr(info, attribute, None)
+                        for attribute, field in FIELDS
+                    },
+                }
+            )
+
+        return [
+            (
+                "{}/{}".format(self.topic, serial),
+                json.dumps({"site": site.siteId, "inverter": serial, "optimizers": optimizers}),
+            )
+            for serial, optimizers in inverters.items()
+        ]
+
+    async def _async_send(self, message) -> None:
+        # Only imported when MQTT export is configured
+        from homeassistant.components import mqtt
+
+        if not await mqtt.async_wait_for_mqtt_client(self.hass):
+            raise ConnectionError("MQTT is not available")
+
+        topic, payload = message
+        await mqtt.async_publish(self.hass, topic, payload, qos=1)
+
+
+@callback
+def async_setup_exporters(hass: HomeAssistant, entry: ConfigEntry, coordinator):
+    """Start the exporters configured in the options of entry, return them."""
+    exporters = []
+    if url := entry.options.get(CONF_EXPORT_INFLUX_URL):
+        exporters.append(
+            InfluxExporter(hass, entry, url, entry.options.get(CONF_EXPORT_INFLUX_TOKEN))
+        )
+    if topic := entry.options.get(CONF_EXPORT_MQTT_TOPIC):
+        exporters.append(MqttExporter(hass, entry, topic))
+
+    for exporter in exporters:
+        _LOGGER.info("Exporting optimizer data to %s", exporter.name)
+        exporter.async_start()
+
+    if exporters:
+
+        @callback
+        def export() -> None:
+            if coordinator.site is None or not coordinator.last_update_success:
+                return
+            for exporter in exporters:
+                exporter.async_export(coordinator.site, coordinator.data)
+
+        entry.async_on_unload(coordinator.async_add_listener(export))
+
+    return exporters
@@ -0,0 +1,281 @@
+"""Bulk export of the measurement history of a SolarEdge site.
+
+Usage (from this directory, no Home Assistant needed):
+
+    python history_export.py --site 12345 --username me --password secret \
+        --start 2025-01-01 --end 2025-03-31 --parameter Power --parameter Energy \
+        --output history.csv
+
+The history is downloaded per item, parameter and day, with a bounded number of
+downloads in parallel. Every finished download is written to the output right
+away and recorded in a checkpoint file, so an interrupted export continues where
+it stopped when the same command is run again.
+"""
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import date, datetime, timedelta
+
+import argparse
+import csv
+import logging
+import os
+import sys
+
+try:
+    from .solaredgeoptimizers import solaredgeoptimizers
+except ImportError:
+    from solaredgeoptimizers import solaredgeoptimizers
+
+_LOGGER = logging.getLogger(__name__)
+
+ITEM_TYPES = ("optimizer", "string", "inverter")
+COLUMNS = ("item_type", "item_id", "item_name", "parameter", "timestamp", "value")
+
+
+def listItems(api, item_types, item_ids=None):
+    """Return (item_type, item_id, name) of all items of the given types in the layout"""
+    solarsite = api.requestListOfAllPanels()
+
+    items = []
+    for inverter in solarsite.inverters:
+        if "inverter" in item_types:
+            items.append(("inverter", inverter.inverterId, inverter.displayName))
+        for string in inverter.strings:
+            if "string" in item_types:
+                items.append(("string", string.stringId, string.displayName))
+            for optimizer in string.optimizers:
+                if "optimizer" in item_types:
+                    items.append(("optimizer", optimizer.optimizerId, optimizer.displayName))
+
+    if item_ids:
+        items = [item for item in items if str(item[1]) in item_ids]
+    return items
+
+
+def requestDay(api, item, parameter, day):
+    """Download one day of history of one item, return it as rows"""
+    item_type, item_id, name = item
+    starttime = datetime(day.year, day.month, day.day)
+    endtime = starttime + timedelta(days=1)
+
+    if item_type == "optimizer":
+        history = api.requestPanelHistory(item_id, starttime, endtime, parameter)
+    elif item_type == "string":
+        history = api.requestStringHistory(item_id, starttime, endtime, parameter)
+    else:
+        history = api.requestInverterHistory(item_id, starttime, endtime, parameter)
+
+    return [
+        (item_type, item_id, name, parameter, timestamp.isoformat(), value)
+        for timestamp, value in sorted(history.items())
+    ]
+
+
+def unitKey(item, parameter, day):
+    return "{}\t{}\t{}\t{}".format(item[0], item[1], parameter, day.isoformat())
+
+
+class Checkpoint:
+    """Append-only file with the keys of all downloads that have been written"""
+
+    def __init__(self, path):
+        self.path = path
+        self.done = set()
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                self.done = {line.rstrip("\n") for line in f if line.strip()}
+        self._file = open(path, "a", encoding="utf-8")
+
+    def add(self, key):
+        self._file.write(key + "\n")
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self.done.add(key)
+
+    def close(self):
+        self._file.close()
+
+
+class CsvWriter:
+    """Append rows to a single CSV file"""
+
+    def __init__(self, path):
+        new_file = not os.path.exists(path) or os.path.getsize(path) == 0
+        self._file = open(path, "a", newline="", encoding="utf-8")
+        self._writer = csv.writer(self._file)
+        if new_file:
+            self._writer.writerow(COLUMNS)
+
+    def write(self, rows):
+        self._writer.writerows(rows)
+        self._file.flush()
+
+    def flush(self):
+        os.fsync(self._file.fileno())
+        return True
+
+    def close(self):
+        self._file.close()
+
+
+class ParquetWriter:
+    """Write rows to a directory of Parquet files, one file per batch of downloads
+
+    A Parquet file is only readable once it is closed, so the rows of a batch are
+    kept in memory until the batch is complete.
+    """
+
+    def __init__(self, path, batch_size):
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError as e:
+            raise SystemExit("The parquet format requires pyarrow to be installed") from e
+
+        self._pa = pyarrow
+        self._pq = pyarrow.parquet
+        self.path = path
+        self.batch_size = batch_size
+        self._rows = []
+        self._downloads = 0
+        os.makedirs(path, exist_ok=True)
+        self._part = len([name for name in os.listdir(path) if name.endswith(".parquet")])
+
+    def write(self, rows):
+        self._rows.extend(rows)
+        self._downloads += 1
+
+    def flush(self):
+        """Write the current batch when it is full, return True when everything is written"""
+        if self._downloads < self.batch_size:
+            return False
+        self._writeBatch()
+        return True
+
+    def _writeBatch(self):
+        if self._rows:
+            columns = list(zip(*self._rows))
+            table = self._pa.table({
+                "item_type": self._pa.array(columns[0], self._pa.string()),
+                "item_id": self._pa.array([str(value) for value in columns[1]], self._pa.string()),
+                "item_name": self._pa.array(columns[2], self._pa.string()),
+                "parameter": self._pa.array(columns[3], self._pa.string()),
+                "timestamp": self._pa.array([datetime.fromisoformat(value) for value in columns[4]], self._pa.timestamp("ms", tz="UTC")),
+                "value": self._pa.array([None if value is None else float(value) for value in columns[5]], self._pa.float64()),
+            })
+            name = os.path.join(self.path, "part-{:05d}.parquet".format(self._part))
+            self._pq.write_table(table, name + ".tmp")
+            os.replace(name + ".tmp", name)
+            self._part += 1
+        self._rows = []
+        self._downloads = 0
+
+    def close(self):
+        self._writeBatch()
+
+
+def export(api, items, parameters, start, end, writer, checkpoint, workers=4):
+    """Download all (item, parameter, day) combinations not in the checkpoint and write them"""
+    units = []
+    day = start
+    while day <= end:
+        for item in items:
+            for parameter in parameters:
+                if unitKey(item, parameter, day) not in checkpoint.done:
+                    units.append((item, parameter, day))
+        day += timedelta(days=1)
+
+    _LOGGER.info("%s downloads to do, %s already done", len(units), len(checkpoint.done))
+
+    # Keys that have been written but are not yet safely flushed
+    pending = []
+    failed = 0
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        # Only a bounded number of downloads is submitted at a time, so the
+        # memory use does not depend on the length of the export
+        queue = iter(units)
+        running = {}
+
+        def submitNext():
+            for unit in queue:
+                running[executor.submit(requestDay, api, *unit)] = unit
+                return
+
+        for _ in range(max(1, workers) * 2):
+            submitNext()
+
+        while running:
+            future = next(as_completed(running))
+            unit = running.pop(future)
+            submitNext()
+
+            try:
+                rows = future.result()
+            except Exception as e:
+                failed += 1
+                _LOGGER.error("Failed to download %s: %s", unitKey(*unit), e)
+                continue
+
+            writer.write(rows)
+            pending.append(unitKey(*unit))
+            if writer.flush():
+                for key in pending:
+                    checkpoint.add(key)
+                pending = []
+
+    writer.close()
+    for key in pending:
+        checkpoint.add(key)
+
+    return len(units) - failed, failed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export the measurement history of a SolarEdge site")
+    parser.add_argument("--site", required=True, help="site id")
+    parser.add_argument("--username", default=os.environ.get("SOLAREDGE_USERNAME"))
+    parser.add_argument("--password", default=os.environ.get("SOLAREDGE_PASSWORD"))
+    parser.add_argument("--start", required=True, type=date.fromisoformat, help="first day, YYYY-MM-DD")
+    parser.add_argument("--end", required=True, type=date.fromisoformat, help="last day (inclusive), YYYY-MM-DD")
+    parser.add_argument("--parameter", action="append", help="parameter to export, can be repeated (default: Power)")
+    parser.add_argument("--type", action="append", choices=ITEM_TYPES, help="item type to export, can be repeated (default: optimizer)")
+    parser.add_argument("--item", action="append", help="id of an item to export, can be repeated (default: all items)")
+    parser.add_argument("--format", choices=("csv", "parquet"), default="csv")
+    parser.add_argument("--output", required=True, help="CSV file, or directory for parquet")
+    parser.add_argument("--checkpoint", help="checkpoint file (default: <output>.checkpoint)")
+    parser.add_argument("--workers", type=int, default=4, help="number of parallel downloads")
+    parser.add_argument("--batch", type=int, default=50, help="downloads per parquet file")
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+
+    if not args.username or not args.password:
+        parser.error("--username and --password (or SOLAREDGE_USERNAME and SOLAREDGE_PASSWORD) are required")
+    if args.end < args.start:
+        parser.error("--end is before --start")
+
+    api = solaredgeoptimizers(args.site, args.username, args.password)
+    items = listItems(api, args.type or ["optimizer"], args.item)
+    if not items:
+        parser.error("no items found to export")
+
+    if args.format == "csv":
+        writer = CsvWriter(args.output)
+    else:
+        writer = ParquetWriter(args.output, max(1, args.batch))
+
+    checkpoint = Checkpoint(args.checkpoint or args.output.rstrip("/\\") + ".checkpoint")
+    try:
+        done, failed = export(api, items, args.parameter or ["Power"], args.start, args.end, writer, checkpoint, args.workers)
+    finally:
+        checkpoint.close()
+
+    _LOGGER.info("Exported %s downloads, %s failed", done, failed)
+    if failed:
+        _LOGGER.info("Run the same command again to retry the failed downloads")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,159 @@
+"""Rolling sample buffers per optimizer for the SolarEdge Optimizers Data integration."""
+from __future__ import annotations
+
+import numpy as np
+
+from .const import (
+    SAMPLE_AVERAGE_WINDOW,
+    SAMPLE_BUFFER_SIZE,
+    SAMPLE_MAX_GAP,
+)
+from .solaredgeoptimizers import measurementOrNan
+
+# Columns of the sample array
+TIME = 0
+DAY = 1
+POWER = 2
+VOLTAGE = 3
+CURRENT = 4
+COLUMNS = 5
+
+
+class SampleRing:
+    """Fixed-size ring buffer with the recent samples of one optimizer.
+
+    Every sample holds the measurement time (epoch seconds), the local day
+    (ordinal) and the power, voltage and current. The derived values are kept as
+    running aggregates, so adding a sample and reading a derived value are O(1)
+    amortized: every sample enters and leaves the average window once.
+
+    - average power over the last SAMPLE_AVERAGE_WINDOW seconds
+    - energy today (Wh), the trapezoidal integral of the power since local midnight;
+      gaps longer than SAMPLE_MAX_GAP seconds are not integrated
+    - peak power today
+    """
+
+    def __init__(
+        self,
+        size=SAMPLE_BUFFER_SIZE,
+        average_window=SAMPLE_AVERAGE_WINDOW,
+        max_gap=SAMPLE_MAX_GAP,
+    ):
+        self.size = size
+        self.average_window = average_window
+        self.max_gap = max_gap
+
+        self._samples = np.full((size, COLUMNS), np.nan)
+        # Sequence number of the next sample, sample n is stored at row n % size
+        self._next = 0
+        # Sequence number of the oldest sample in the average window
+        self._tail = 0
+        self._window_sum = 0.0
+        self._window_count = 0
+
+        self._day = None
+        self._energy = 0.0
+        self._peak = None
+
+    def __len__(self):
+        return min(self._next, self.size)
+
+    def push(self, timestamp, day, power, voltage, current) -> bool:
+        """Add a sample, return False when it is not newer than the last sample."""
+        last = self._last()
+        if last is not None and timestamp <= last[TIME]:
+            return False
+
+        power = measurementOrNan(power)
+        if day != self._day:
+            self._day = day
+            self._energy = 0.0
+            self._peak = None
+        elif (
+            last is not None
+            and timestamp - last[TIME] <= self.max_gap
+            and not np.isnan(power)
+            and not np.isnan(last[POWER])
+        ):
+            self._energy += (power + last[POWER]) / 2 * (timestamp - last[TIME]) / 3600
+        if not np.isnan(power) and (self._peak is None or power > self._peak):
+            self._peak = float(power)
+
+        # Make room: the oldest sample leaves the window before it is overwritten
+        if self._tail <= self._next - self.size:
+            self._evict()
+
+        self._samples[self._next % self.size] = (
+            timestamp,
+            day,
+            power,
+            measurementOrNan(voltage),
+            measurementOrNan(current),
+        )
+        self._next += 1
+        if not np.isnan(power):
+            self._window_sum += power
+            self._window_count += 1
+        self._expire(timestamp)
+        return True
+
+    def average_power(self, now):
+        """Return the average power of the samples of the last window before now, or None."""
+        self._expire(now)
+        if not self._window_count:
+            return None
+        return self._window_sum / self._window_count
+
+    def energy_today(self, today):
+        """Return the energy (Wh) produced on the local day today."""
+        return self._energy if today == self._day else 0.0
+
+    def peak_power_today(self, today):
+        """Return the highest power (W) on the local day today, or None."""
+        return self._peak if today == self._day else None
+
+    def _last(self):
+        if not self._next:
+            return None
+        return self._samples[(self._next - 1) % self.size]
+
+    def _expire(self, now):
+        while (
+            self._tail < self._next
+            and self._samples[self._tail % self.size, TIME] < now - self.average_window
+        ):
+            self._evict()
+
+    def _evict(self):
+        power = self._samples[self._tail % self.size, POWER]
+        if not np.isnan(power):
+            self._window_sum -= power
+            self._window_count -= 1
+            if not self._window_count:
+                # Do not let rounding errors accumulate
+                self._window_sum = 0.0
+        self._tail += 1
+
+    def toSnapshot(self):
+        """Return the samples the aggregates depend on, oldest first, in a JSON serializable form.
+
+        These are the samples of the current day and those in the average window.
+        """
+        last = self._last()
+        rows = [
+            self._samples[n % self.size]
+            for n in range(max(0, self._next - self.size), self._next)
+        ]
+        return [
+            [None if np.isnan(value) else float(value) for value in row]
+            for row in rows
+            if row[DAY] == self._day or row[TIME] >= last[TIME] - self.average_window
+        ]
+
+    @classmethod
+    def fromSnapshot(cls, rows, **kwargs):
+        """Rebuild a SampleRing, and its aggregates, from toSnapshot()."""
+        ring = cls(**kwargs)
+        for timestamp, day, power, voltage, current in rows:
+            ring.push(timestamp, int(day), power, voltage, current)
+        return ring
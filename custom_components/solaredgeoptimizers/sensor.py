@@ -30,6 +30,12 @@ from .const import (
     SENSOR_TYPE_VOLTAGE,
     SENSOR_TYPE_ENERGY,
     SENSOR_TYPE_LASTMEASUREMENT,
+    SENSOR_TYPE_AVERAGE_POWER,
+    SENSOR_TYPE_ENERGY_TODAY,
+    SENSOR_TYPE_ENERGY_TODAY_ESTIMATE,
+    SENSOR_TYPE_PEAK_POWER,
+    DEADBAND_OPTIONS,
+    DEFAULT_DEADBAND,
 )
 
 # AJT: 10-Jan-2025: Changed import to use coordinator module
@@ -50,6 +56,9 @@ from .solaredgeoptimizers import (
 
 _LOGGER = logging.getLogger(__name__)
 
+# Marks a sensor that has not written a state yet
+_NOT_WRITTEN = object()
+
 
 async def async_setup_entry(
     hass: HomeAssistant,
@@ -60,7 +69,8 @@ async def async_setup_entry(
     # Add the needed sensors to hass
     coordinator: MyCoordinator = hass.data[DOMAIN][entry.entry_id]
 
-    site = await hass.async_add_executor_job(coordinator.my_api.requestListOfAllPanels)
+    # The layout and the data of every optimizer are already known by the coordinator
+    site = coordinator.site
 
     _LOGGER.info("Found all information for site: %s", site.siteId)
     _LOGGER.info("Site has %s inverters", len(site.inverters))
@@ -69,37 +79,31 @@ async def async_setup_entry(
         site.returnNumberOfOptimizers(),
     )
 
-    i = 1
-    for inverter in site.inverters:
-        _LOGGER.info("Adding all optimizers from inverter: %s", i)
-        for string in inverter.strings:
-            for optimizer in string.optimizers:
-                _LOGGER.info(
-                    "Added optimizer for panel_id: %s to Home Assistant",
-                    optimizer.displayName,
-                )
-
-                # extra informatie ophalen
-                info = await hass.async_add_executor_job(
-                    coordinator.my_api.requestSystemData, optimizer.optimizerId
+    @callback
+    def add_optimizers(optimizers) -> None:
+        entities = []
+        for inverter, optimizer, info in optimizers:
+            _LOGGER.info(
+                "Added optimizer for panel_id: %s to Home Assistant",
+                optimizer.displayName,
+            )
+            for sensortype in SENSOR_TYPE:
+                entities.append(
+                    SolarEdgeOptimizersSensor(
+                        coordinator,
+                        hass,
+                        entry,
+                        info,
+                        sensortype,
+                        optimizer,
+                        inverter
+                    )
                 )
+        async_add_entities(entities)
 
-                if info is not None:
-                    for sensortype in SENSOR_TYPE:
-                        async_add_entities(
-                            [
-                                SolarEdgeOptimizersSensor(
-                                    coordinator,
-                                    hass,
-                                    entry,
-                                    info,
-                                    sensortype,
-                                    optimizer,
-                                    inverter
-                                )
-                            ],
-                            update_before_add=True,
-                        )
+    add_optimizers(coordinator.known_optimizers())
+    # Optimizers added to the layout later get their sensors without a reload
+    entry.async_on_unload(coordinator.async_add_layout_listener(add_optimizers))
 
     _LOGGER.info(
         "Done adding all optimizers. Now adding sensors, this may take some time!"
@@ -142,6 +146,12 @@ class SolarEdgeOptimizersSensor(CoordinatorEntity, SensorEntity):
         self._sensor_type = sensortype
         self._attr_name = "{}_{}".format(self._sensor_type, optimizer.displayName)
 
+        self._deadband = entry.options.get(
+            DEADBAND_OPTIONS.get(self._sensor_type), DEFAULT_DEADBAND
+        )
+        self._written_value = _NOT_WRITTEN
+        self._written_available = None
+
         self._attr_device_info = DeviceInfo(
             identifiers={(DOMAIN, f"{entry.entry_id}")},
         )
@@ -166,9 +176,20 @@ class SolarEdgeOptimizersSensor(CoordinatorEntity, SensorEntity):
             self._attr_native_unit_of_measurement = UnitOfEnergy.KILO_WATT_HOUR
             self._attr_device_class = SensorDeviceClass.ENERGY
             self._attr_state_class = SensorStateClass.TOTAL_INCREASING
+            # Monotonic guard value, persisted by the coordinator across restarts
+            self._attr_native_value = coordinator.guards.get(self._attr_unique_id)
         elif self._sensor_type is SENSOR_TYPE_LASTMEASUREMENT:
             self._attr_device_class = SensorDeviceClass.DATE
             self._attr_state_class = None
+        elif self._sensor_type in (SENSOR_TYPE_AVERAGE_POWER, SENSOR_TYPE_PEAK_POWER):
+            self._attr_native_unit_of_measurement = UnitOfPower.WATT
+            self._attr_device_class = SensorDeviceClass.POWER
+            self._attr_state_class = SensorStateClass.MEASUREMENT
+        elif self._sensor_type in (SENSOR_TYPE_ENERGY_TODAY, SENSOR_TYPE_ENERGY_TODAY_ESTIMATE):
+            self._attr_native_unit_of_measurement = UnitOfEnergy.KILO_WATT_HOUR
+            self._attr_device_class = SensorDeviceClass.ENERGY
+            # Drops to zero at local midnight, which counts as a meter reset
+            self._attr_state_class = SensorStateClass.TOTAL_INCREASING
 
     @property
     def device_info(self):
@@ -184,10 +205,52 @@ class SolarEdgeOptimizersSensor(CoordinatorEntity, SensorEntity):
             "via_device": (DOMAIN, self._inverter.serialNumber),
         }
 
+    async def async_added_to_hass(self) -> None:
+        """Also listen for partial updates of this optimizer during a refresh."""
+        await super().async_added_to_hass()
+        # Start with the data the coordinator already has, without a new refresh
+        self._update_native_value()
+        # The state is written right after this method returns
+        self._written_value = self._attr_native_value
+        self._written_available = self.available
+        self.async_on_remove(
+            self.coordinator.async_add_paneel_listener(
+                self._paneelobject.paneel_id, self._handle_coordinator_update
+            )
+        )
+
     @callback
     def _handle_coordinator_update(self) -> None:
         """Handle updated data from the coordinator."""
+        self._update_native_value()
+
+        if not self._is_significant_change():
+            self.coordinator.write_stats["suppressed"] += 1
+            return
 
+        self._written_value = self._attr_native_value
+        self._written_available = self.available
+        self.coordinator.write_stats["written"] += 1
+        self.async_write_ha_state()
+
+    def _is_significant_change(self) -> bool:
+        """Return if the state differs enough from the last written state to write it."""
+        if self._written_value is _NOT_WRITTEN or self.available != self._written_available:
+            return True
+
+        old = self._written_value
+        new = self._attr_native_value
+        if old == new:
+            return False
+        if (
+            self._deadband
+            and isinstance(old, (int, float))
+            and isinstance(new, (int, float))
+        ):
+            return abs(new - old) > self._deadband
+        return True
+
+    def _update_native_value(self) -> None:
         if self.coordinator.data is not None:
 
             _LOGGER.debug(
@@ -196,33 +259,30 @@ class SolarEdgeOptimizersSensor(CoordinatorEntity, SensorEntity):
                 self._sensor_type,
             )
 
-            for item in self.coordinator.data:
-                if item.paneel_id == self._paneelobject.paneel_id:
-                    # weird first time after reboot value is None
-                    # if self._attr_native_value is not None:
-                    if self._sensor_type is SENSOR_TYPE_VOLTAGE:
-                        self._attr_native_value = item.voltage
-                        break
-                    elif self._sensor_type is SENSOR_TYPE_CURRENT:
-                        self._attr_native_value = item.current
-                        break
-                    elif self._sensor_type is SENSOR_TYPE_OPT_VOLTAGE:
-                        self._attr_native_value = item.optimizer_voltage
-                        break
-                    elif self._sensor_type is SENSOR_TYPE_POWER:
-                        self._attr_native_value = item.power
-                        break
-                    elif self._sensor_type is SENSOR_TYPE_ENERGY:
-                        # AJT: 10-Jan-2025: Removed redundant else clause that assigned self._attr_native_value = self._attr_native_value
-                        if (
-                            self._attr_native_value is None
-                            or item.lifetime_energy >= self._attr_native_value
-                        ):
-                            self._attr_native_value = item.lifetime_energy
-                        break
-                    elif self._sensor_type is SENSOR_TYPE_LASTMEASUREMENT:
-                        self._attr_native_value = item.lastmeasurement
-                        break
+            item = self.coordinator.get_paneel(self._paneelobject.paneel_id)
+            if item is not None:
+                # weird first time after reboot value is None
+                # if self._attr_native_value is not None:
+                if self._sensor_type is SENSOR_TYPE_VOLTAGE:
+                    self._attr_native_value = item.voltage
+                elif self._sensor_type is SENSOR_TYPE_CURRENT:
+                    self._attr_native_value = item.current
+                elif self._sensor_type is SENSOR_TYPE_OPT_VOLTAGE:
+                    self._attr_native_value = item.optimizer_voltage
+                elif self._sensor_type is SENSOR_TYPE_POWER:
+                    self._attr_native_value = item.power
+                elif self._sensor_type is SENSOR_TYPE_ENERGY:
+                    # AJT: 10-Jan-2025: Removed redundant else clause that assigned self._attr_native_value = self._attr_native_value
+                    if (
+                        self._attr_native_value is None
+                        or item.lifetime_energy >= self._attr_native_value
+                    ):
+                        self._attr_native_value = item.lifetime_energy
+                        self.coordinator.guards[self._attr_unique_id] = item.lifetime_energy
+                elif self._sensor_type is SENSOR_TYPE_LASTMEASUREMENT:
+                    self._attr_native_value = item.lastmeasurement
+                else:
+                    self._update_derived_value()
         else:
             # Set the value to zero. (BUT NOT FOR LIFETIME ENERGY)
             # AJT: 10-Jan-2025: Fixed comparison syntax from "not self._sensor_type is" to "self._sensor_type is not"
@@ -231,14 +291,25 @@ class SolarEdgeOptimizersSensor(CoordinatorEntity, SensorEntity):
             ):
                 self._attr_native_value = 0
 
-        value = self._attr_native_value
-        if isinstance(value, str) and "," in value:
-            # AJT: 11-Jan-2026: Added error handling for float conversion
-            try:
-                self._attr_native_value = float(value.replace(",", ""))
-            except ValueError:
-                _LOGGER.warning("Could not convert value '%s' to float for sensor %s", value, self._attr_name)
-                # Keep original value
-
-        self.async_write_ha_state()
-
+    def _update_derived_value(self) -> None:
+        """Set a value derived from the recent samples of the optimizer."""
+        paneel_id = self._paneelobject.paneel_id
+        ring = self.coordinator.get_samples(paneel_id)
+        now = dt_util.now()
+
+        if self._sensor_type is SENSOR_TYPE_ENERGY_TODAY:
+            # Only the Energy history of the portal: switching to or from the
+            # estimate would be counted as a meter reset. Unknown until it is there.
+            value = self.coordinator.energy.energy_today(paneel_id, now.date())
+            self._attr_native_value = None if value is None else round(value, 3)
+        elif ring is None:
+            self._attr_native_value = None
+        elif self._sensor_type is SENSOR_TYPE_AVERAGE_POWER:
+            value = ring.average_power(now.timestamp())
+            self._attr_native_value = None if value is None else round(value, 1)
+        elif self._sensor_type is SENSOR_TYPE_ENERGY_TODAY_ESTIMATE:
+            # Wh to kWh
+            self._attr_native_value = round(ring.energy_today(now.date().toordinal()) / 1000, 3)
+        elif self._sensor_type is SENSOR_TYPE_PEAK_POWER:
+            value = ring.peak_power_today(now.date().toordinal())
+            self._attr_native_value = None if value is None else round(value, 1)
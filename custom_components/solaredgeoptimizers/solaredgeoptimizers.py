@@ -1,64 +1,303 @@
 """ My module """
+import asyncio
 import time
 
 import requests
 import json
 import logging
-import pytz
-
+import math
+import re
+import threading
+
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from contextlib import aclosing
+from functools import partial
 from requests import Session
-from datetime import datetime, timedelta
-from jsonfinder import jsonfinder
+from datetime import datetime, timedelta, timezone
 
 # AJT: 10-Jan-2025: Added logger setup to replace print statements with proper logging
 _LOGGER = logging.getLogger(__name__)
 
+# Number of optimizers requested in parallel by iterAllData
+DEFAULT_MAX_WORKERS = 4
+
+# (connect, read) timeout in seconds of every request
+DEFAULT_TIMEOUT = (10, 30)
+
+DEFAULT_BASE_URL = "https://monitoring.solaredge.com"
+
+
+class DeadlineExceeded(requests.Timeout):
+    """The deadline passed to a request has been reached"""
+
+
+class SessionExpired(Exception):
+    """The login of a shared session expired, the portal answered with the login page or an error"""
+
+
+class SingleFlight:
+    """
+    Let concurrent identical calls share a single call and its result
+    A caller that arrives while a call with the same key is in flight waits for that
+    call and gets its result (or exception) instead of making the call itself. Works
+    for threads (do) and asyncio tasks (async_do), also mixed. Waiting callers share
+    the outcome of the first caller, including a DeadlineExceeded of its deadline.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self._asyncCalls = {}
+        self.stats = {"calls": 0, "shared": 0}
+
+    def do(self, key, fn, *args, deadline=None):
+        """
+        Call fn(*args), or wait for the call in flight with the same key
+        :param deadline: time.monotonic() value to stop waiting for the call in flight, or None
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _FlightCall()
+                self.stats["calls"] += 1
+            else:
+                self.stats["shared"] += 1
+
+        if leader:
+            try:
+                call.result = fn(*args)
+                return call.result
+            except BaseException as e:
+                call.error = e
+                raise
+            finally:
+                with self._lock:
+                    del self._calls[key]
+                call.done.set()
+
+        timeout = None if deadline is None else max(0, deadline - time.monotonic())
+        if not call.done.wait(timeout):
+            raise DeadlineExceeded("Deadline reached while waiting for a shared request")
+        if call.error is not None:
+            raise call.error
+        return call.result
+
+    async def async_do(self, key, fn, *args, deadline=None, executor=None):
+        """
+        Same as do for asyncio callers: fn runs in executor (None for the default executor
+        of the loop), waiting tasks do not occupy a thread
+        """
+        loop = asyncio.get_running_loop()
+        future = self._asyncCalls.get((loop, key))
+        if future is None:
+            future = loop.run_in_executor(executor, partial(self.do, key, fn, *args, deadline=deadline))
+            self._asyncCalls[(loop, key)] = future
+            future.add_done_callback(partial(self._asyncCallDone, (loop, key)))
+        else:
+            with self._lock:
+                self.stats["shared"] += 1
+
+        timeout = None if deadline is None else max(0, deadline - time.monotonic())
+        try:
+            # Cancelling or timing out one caller does not affect the others
+            return await asyncio.wait_for(asyncio.shield(future), timeout)
+        except asyncio.TimeoutError as e:
+            raise DeadlineExceeded("Deadline reached while waiting for a shared request") from e
+
+    def _asyncCallDone(self, key, future):
+        self._asyncCalls.pop(key, None)
+        if not future.cancelled():
+            # Retrieved here, so an error nobody waits for anymore is not reported as unhandled
+            future.exception()
+
+
+class _FlightCall:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+# Locale of the measurement values requested from the portal
+DEFAULT_LOCALE = "en_US"
+
+# (thousands separator, decimal separator) per language of a locale, spaces are always
+# removed as thousands separator
+NUMBER_SEPARATORS = {
+    "en": (",", "."),
+    "nl": (".", ","),
+    "de": (".", ","),
+    "it": (".", ","),
+    "es": (".", ","),
+    "fr": ("", ","),
+}
+
+
+def _numberPattern(group, decimal):
+    integer = r"\d+"
+    if group:
+        # A thousands separator needs a leading group without a leading zero and groups of 3 digits
+        integer = r"(?:\d+|[1-9]\d{{0,2}}(?:{}\d{{3}})+)".format(re.escape(group))
+    return re.compile(r"[-+]?{}(?:{}\d+)?".format(integer, re.escape(decimal)))
+
+
+_NUMBER_PATTERNS = {
+    separators: _numberPattern(*separators)
+    for separators in set(NUMBER_SEPARATORS.values()) | {(",", "."), (".", ",")}
+}
+
+
+def parseMeasurement(value, locale=DEFAULT_LOCALE):
+    """
+    Convert a measurement value of the portal to float
+    The value is parsed with the thousands and decimal separators of locale, e.g. "1,234.5"
+    for en_US and "1.234,5" for nl_NL. A value that is not a valid number in locale, e.g.
+    "12,5" or "0,125" for en_US, is parsed with the other convention of separators, as the
+    portal does not always format the values for the requested locale.
+    :return: float, or None if the value is not a number
+    """
+    if value is None or isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+
+    text = str(value).strip().replace(" ", "").replace("\u00a0", "").replace("\u202f", "")
+    group, decimal = NUMBER_SEPARATORS.get(
+        str(locale).replace("-", "_").split("_")[0].lower(), NUMBER_SEPARATORS["en"]
+    )
+    fallback = (",", ".") if decimal == "," else (".", ",")
+    for group, decimal in ((group, decimal), fallback):
+        if _NUMBER_PATTERNS[(group, decimal)].fullmatch(text):
+            if group:
+                text = text.replace(group, "")
+            return float(text.replace(decimal, "."))
+    return None
+
+
+def measurementOrNan(value):
+    """Return a measurement value parsed by parseMeasurement as float, or NaN when it is missing"""
+    return math.nan if value is None else value
+
+
 class solaredgeoptimizers:
-    def __init__(self, siteid, username, password):
+    def __init__(self, siteid, username, password, timeout=DEFAULT_TIMEOUT, base_url=DEFAULT_BASE_URL, locale=DEFAULT_LOCALE):
         self.siteid = siteid
         self.username = username
         self.password = password
+        self.timeout = timeout
+        self.base_url = base_url
+        # Locale the measurement values are requested in, and parsed with
+        self.locale = locale
+        self._session = None
+        self._sessionLock = threading.Lock()
+        self._prefetchedLayout = None
+        self._webSession = None
+        self._webSessionLock = threading.Lock()
+        # Concurrent identical requests share one request to the portal
+        self.flights = SingleFlight()
+
+    def _getSession(self):
+        """Return the session with basic authentication, shared by all requests that need no login cookies"""
+        with self._sessionLock:
+            if self._session is None:
+                self._session = Session()
+                self._session.auth = requests.auth.HTTPBasicAuth(self.username, self.password)
+            return self._session
+
+    def _timeout(self, deadline=None):
+        """
+        Return the timeout for a request, shortened so the request ends before the deadline
+        :param deadline: time.monotonic() value the request has to be done by, or None
+        """
+        if deadline is None:
+            return self.timeout
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise DeadlineExceeded("Deadline reached before the request was sent")
+        connect, read = self.timeout
+        return (min(connect, remaining), min(read, remaining))
+
+    def _remaining(self, deadline):
+        return None if deadline is None else max(0, deadline - time.monotonic())
+
+    def close(self):
+        """Close the shared sessions and their connections"""
+        with self._sessionLock:
+            if self._session is not None:
+                self._session.close()
+                self._session = None
+        self._dropWebSession()
+
+    def check_auth(self):
+        """
+        Check the credentials without downloading the logical layout
+        :return: HTTP status code of the logical layout request
+        """
+        url = "{}/solaredge-apigw/api/sites/{}/layout/logical".format(
+            self.base_url, self.siteid
+        )
+
+        kwargs = {}
+        kwargs["headers"] = {"user-agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/105.0.0.0 Safari/537.36",
+                             }
+        # With stream=True only the status and headers are read, the body is never downloaded
+        with self._getSession().get(url, stream=True, timeout=self._timeout(), **kwargs) as r:
+            return r.status_code
 
     def check_login(self):
-        url = "https://monitoring.solaredge.com/solaredge-apigw/api/sites/{}/layout/logical".format(
-            self.siteid
+        url = "{}/solaredge-apigw/api/sites/{}/layout/logical".format(
+            self.base_url, self.siteid
         )
 
         kwargs = {}
-        kwargs["auth"] = requests.auth.HTTPBasicAuth(self.username, self.password)
         kwargs["headers"] = {"user-agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/105.0.0.0 Safari/537.36",
                              }
         # AJT: 11-Jan-2026: Use context manager to ensure response is properly closed
-        with requests.get(url, **kwargs) as r:
+        with self._getSession().get(url, timeout=self._timeout(), **kwargs) as r:
+            if r.status_code == 200:
+                # Keep the layout, so the next requestListOfAllPanels does not download it again
+                self._prefetchedLayout = r.text
             return r.status_code
 
-    def requestLogicalLayout(self):
-        url = "https://monitoring.solaredge.com/solaredge-apigw/api/sites/{}/layout/logical".format(
-            self.siteid
+    def requestLogicalLayout(self, deadline=None):
+        url = "{}/solaredge-apigw/api/sites/{}/layout/logical".format(
+            self.base_url, self.siteid
         )
 
-        kwargs = {}
-
-        kwargs["auth"] = requests.auth.HTTPBasicAuth(self.username, self.password)
         # AJT: 11-Jan-2026: Use context manager to ensure response is properly closed
-        with requests.get(url, **kwargs) as r:
+        with self._getSession().get(url, timeout=self._timeout(deadline)) as r:
             return r.text
 
-    def requestListOfAllPanels(self):
-        json_obj = json.loads(self.requestLogicalLayout())
+    def requestListOfAllPanels(self, deadline=None):
+        return self.flights.do(("layout",), self._requestListOfAllPanels, deadline, deadline=deadline)
+
+    async def arequestListOfAllPanels(self, deadline=None, executor=None):
+        """
+        Async variant of requestListOfAllPanels, the blocking request is done in executor,
+        or the default executor of the loop when None
+        """
+        return await self.flights.async_do(("layout",), self._requestListOfAllPanels, deadline, deadline=deadline, executor=executor)
+
+    def _requestListOfAllPanels(self, deadline=None):
+        layout, self._prefetchedLayout = self._prefetchedLayout, None
+        if layout is None:
+            layout = self.requestLogicalLayout(deadline)
+        json_obj = json.loads(layout)
         return SolarEdgeSite(json_obj)
 
-    def requestSystemData(self, itemId):
+    def requestSystemData(self, itemId, deadline=None):
+        return self.flights.do(("systemData", itemId), self._requestSystemData, itemId, deadline, deadline=deadline)
+
+    def _requestSystemData(self, itemId, deadline=None):
         # AJT: 10-Jan-2025: Fixed endpoint URL - changed from monitoringpublic.solaredge.com/publicSystemData to monitoring.solaredge.com/systemData,
         # changed isPublic=true to false, added locale parameter, and added v parameter with timestamp
-        url = "https://monitoring.solaredge.com/solaredge-web/p/systemData?reporterId={}&type=panel&activeTab=0&fieldId={}&isPublic=false&locale=en_US&v={}".format(
-            itemId, self.siteid, round(time.time() * 1000)
+        url = "{}/solaredge-web/p/systemData?reporterId={}&type=panel&activeTab=0&fieldId={}&isPublic=false&locale={}&v={}".format(
+            self.base_url, itemId, self.siteid, self.locale, round(time.time() * 1000)
         )
 
-        kwargs = {}
-        kwargs["auth"] = requests.auth.HTTPBasicAuth(self.username, self.password)
         # AJT: 11-Jan-2026: Use context manager to ensure response is properly closed
-        with requests.get(url, **kwargs) as r:
+        with self._getSession().get(url, timeout=self._timeout(deadline)) as r:
             if r.status_code == 200:
                 json_object = self.decodeResult(r.text)
                 try:
@@ -81,7 +320,7 @@ class solaredgeoptimizers:
                         _LOGGER.debug("Skipping optimizer %s without measurements", itemId)
                         return None
                     else:
-                        return SolarEdgeOptimizerData(itemId, json_object)
+                        return SolarEdgeOptimizerData(itemId, json_object, self.locale)
                 except KeyError as e:
                     # AJT: 10-Jan-2025: Added specific KeyError handling with better logging
                     _LOGGER.error("Missing expected key in response for optimizer %s: %s", itemId, e)
@@ -98,39 +337,204 @@ class solaredgeoptimizers:
                 _LOGGER.error(r.text)
                 raise Exception(f"Problem sending request, status code {r.status_code}: {r.text}")
 
-    def requestAllData(self):
+    def requestAllData(self, deadline=None):
+        """
+        Request the current data of all optimizers
+        :param deadline: time.monotonic() value to stop at, or None to wait for all optimizers
+        :return: SolarEdgeAllData, when the deadline is reached it only has the optimizers done so far
+            and the ids of the others are in its missing attribute
+        """
+        data = SolarEdgeAllData()
+        data.extend(self.iterAllData(deadline=deadline, missing=data.missing if deadline is not None else None))
+        return data
 
-        solarsite = self.requestListOfAllPanels()
+    def iterAllData(self, ordered=True, max_workers=DEFAULT_MAX_WORKERS, solarsite=None, deadline=None, missing=None):
+        """
+        Request the current data of all optimizers, yielding every SolarEdgeOptimizerData as soon as it is available
+        :param ordered: True to yield in layout order, False to yield in the order the responses complete
+        :param max_workers: number of optimizers requested in parallel
+        :param solarsite: SolarEdgeSite to use, or None to request the logical layout first
+        :param deadline: time.monotonic() value by which all requests have to be done, or None
+        :param missing: list to add the optimizerId to of every optimizer that timed out or was not
+            requested before the deadline, or None to raise the timeout instead
+        :return: generator of SolarEdgeOptimizerData, optimizers without measurements are skipped
+        """
+        if solarsite is None:
+            solarsite = self.requestListOfAllPanels(deadline)
 
-        # AJT: 11-Jan-2026: Added error handling for getLifeTimeEnergy() response
-        lifetime_energy_response = self.getLifeTimeEnergy()
-        if lifetime_energy_response.startswith("ERROR001"):
-            _LOGGER.error("Failed to get lifetime energy data: %s", lifetime_energy_response)
-            lifetimeenergy = {}
-        else:
+        lifetimeenergy = self._requestLifeTimeEnergyMap(deadline)
+
+        optimizers = [
+            optimizer
+            for inverter in solarsite.inverters
+            for string in inverter.strings
+            for optimizer in string.optimizers
+        ]
+
+        executor = ThreadPoolExecutor(max_workers=max(1, max_workers))
+        try:
+            futures = [
+                executor.submit(self.requestSystemData, optimizer.optimizerId, deadline)
+                for optimizer in optimizers
+            ]
+            by_future = dict(zip(futures, optimizers))
+            handled = set()
             try:
-                lifetimeenergy = json.loads(lifetime_energy_response)
-            except json.JSONDecodeError as e:
-                _LOGGER.error("Failed to parse lifetime energy JSON: %s", e)
-                lifetimeenergy = {}
+                if ordered:
+                    completed = iter(futures)
+                else:
+                    completed = as_completed(futures, timeout=self._remaining(deadline))
 
-        data = []
-        for inverter in solarsite.inverters:
-            for string in inverter.strings:
-                for optimizer in string.optimizers:
-                    info = self.requestSystemData(optimizer.optimizerId)
+                for future in completed:
+                    info = self._systemDataResult(future, by_future[future], self._remaining(deadline), missing, lifetimeenergy)
+                    handled.add(future)
                     if info is not None:
-                        # Life time energy adding - AJT: 11-Jan-2026: Added KeyError handling
-                        optimizer_id_str = str(optimizer.optimizerId)
-                        if optimizer_id_str in lifetimeenergy and "unscaledEnergy" in lifetimeenergy[optimizer_id_str]:
-                            info.lifetime_energy = (float(lifetimeenergy[optimizer_id_str]["unscaledEnergy"])) / 1000
-                        else:
-                            _LOGGER.warning("Lifetime energy data missing for optimizer %s, setting to 0", optimizer.optimizerId)
-                            info.lifetime_energy = 0.0
+                        yield info
+            except FutureTimeoutError as e:
+                # The deadline has been reached while waiting for the next optimizer
+                if missing is None:
+                    raise DeadlineExceeded("Deadline reached before all optimizers were requested") from e
+
+                # Keep what is done by now, everything else is missing
+                for future in futures:
+                    if future in handled:
+                        continue
+                    if not future.done():
+                        missing.append(by_future[future].optimizerId)
+                        continue
+                    info = self._systemDataResult(future, by_future[future], 0, missing, lifetimeenergy)
+                    if info is not None:
+                        yield info
+        finally:
+            # Also reached when the consumer stops iterating early
+            executor.shutdown(wait=False, cancel_futures=True)
 
-                        data.append(info)
+        if missing:
+            _LOGGER.warning("No data within the deadline for %s optimizers: %s", len(missing), missing)
 
-        return data
+    def _systemDataResult(self, future, optimizer, timeout, missing, lifetimeenergy):
+        """
+        Return the SolarEdgeOptimizerData of a requestSystemData future, or None
+        Raises FutureTimeoutError when the future is not done within timeout
+        """
+        try:
+            info = future.result(timeout=timeout)
+        except (requests.Timeout, TimeoutError):
+            # TimeoutError is also raised when waiting for the future timed out
+            if not future.done() or missing is None:
+                raise
+            missing.append(optimizer.optimizerId)
+            return None
+
+        if info is not None:
+            self._addLifeTimeEnergy(info, optimizer, lifetimeenergy)
+        return info
+
+    async def aiterAllData(self, ordered=True, max_workers=DEFAULT_MAX_WORKERS, solarsite=None, deadline=None, missing=None, executor=None):
+        """
+        Async variant of iterAllData. Every request is a job of its own in executor, or the default
+        executor of the loop when None, so a bounded executor also bounds the requests per optimizer
+        """
+        loop = asyncio.get_running_loop()
+        if solarsite is None:
+            solarsite = await self.arequestListOfAllPanels(deadline, executor)
+
+        lifetimeenergy = await loop.run_in_executor(executor, self._requestLifeTimeEnergyMap, deadline)
+
+        jobs = [
+            (optimizer, self.requestSystemData, optimizer.optimizerId, deadline)
+            for inverter in solarsite.inverters
+            for string in inverter.strings
+            for optimizer in string.optimizers
+        ]
+        async with aclosing(self._aiterJobs(jobs, executor, max_workers, deadline, ordered)) as results:
+            async for optimizer, task in results:
+                if task is None:
+                    # The deadline has been reached before the optimizer was done
+                    if missing is None:
+                        raise DeadlineExceeded("Deadline reached before all optimizers were requested")
+                    missing.append(optimizer.optimizerId)
+                    continue
+                error = task.exception()
+                if isinstance(error, (requests.Timeout, TimeoutError)) and missing is not None:
+                    missing.append(optimizer.optimizerId)
+                    continue
+                if error is not None:
+                    raise error
+
+                info = task.result()
+                if info is not None:
+                    self._addLifeTimeEnergy(info, optimizer, lifetimeenergy)
+                    yield info
+
+        if missing:
+            _LOGGER.warning("No data within the deadline for %s optimizers: %s", len(missing), missing)
+
+    async def _aiterJobs(self, jobs, executor=None, max_workers=DEFAULT_MAX_WORKERS, deadline=None, ordered=True):
+        """
+        Run the blocking calls of jobs, (key, fn, *args) tuples, in executor with at most max_workers
+        at a time, yielding (key, done task) in the order of jobs when ordered, else as they complete
+        When the deadline is reached the jobs done by then are yielded, and (key, None) for the others.
+        Jobs that are not yielded when the iteration stops are cancelled, queued calls do not run.
+        """
+        loop = asyncio.get_running_loop()
+        semaphore = asyncio.Semaphore(max(1, max_workers))
+
+        async def run(fn, args):
+            async with semaphore:
+                return await loop.run_in_executor(executor, partial(fn, *args))
+
+        tasks = [(key, asyncio.ensure_future(run(fn, args))) for key, fn, *args in jobs]
+        pending = list(tasks)
+        try:
+            while pending:
+                waiting = [pending[0][1]] if ordered else [task for _, task in pending]
+                done, _ = await asyncio.wait(waiting, timeout=self._remaining(deadline), return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    for key, task in pending:
+                        yield key, task if task.done() else None
+                    return
+
+                ready = []
+                for key, task in pending:
+                    if task.done():
+                        ready.append((key, task))
+                    elif ordered:
+                        break
+                pending = [job for job in pending if job not in ready]
+                for key, task in ready:
+                    yield key, task
+        finally:
+            for _, task in tasks:
+                if not task.done():
+                    task.cancel()
+                elif not task.cancelled():
+                    # Retrieved here, so an error nobody waits for anymore is not reported as unhandled
+                    task.exception()
+
+    def _requestLifeTimeEnergyMap(self, deadline=None):
+        return self.flights.do(("lifetimeEnergy",), self.__RequestLifeTimeEnergyMap, deadline, deadline=deadline)
+
+    def __RequestLifeTimeEnergyMap(self, deadline=None):
+        # AJT: 11-Jan-2026: Added error handling for getLifeTimeEnergy() response
+        lifetime_energy_response = self.getLifeTimeEnergy(deadline)
+        if lifetime_energy_response.startswith("ERROR001"):
+            _LOGGER.error("Failed to get lifetime energy data: %s", lifetime_energy_response)
+            return {}
+        try:
+            return json.loads(lifetime_energy_response)
+        except json.JSONDecodeError as e:
+            _LOGGER.error("Failed to parse lifetime energy JSON: %s", e)
+            return {}
+
+    def _addLifeTimeEnergy(self, info, optimizer, lifetimeenergy):
+        # Life time energy adding - AJT: 11-Jan-2026: Added KeyError handling
+        optimizer_id_str = str(optimizer.optimizerId)
+        if optimizer_id_str in lifetimeenergy and "unscaledEnergy" in lifetimeenergy[optimizer_id_str]:
+            info.lifetime_energy = (float(lifetimeenergy[optimizer_id_str]["unscaledEnergy"])) / 1000
+        else:
+            _LOGGER.warning("Lifetime energy data missing for optimizer %s, setting to 0", optimizer.optimizerId)
+            info.lifetime_energy = 0.0
 
     def requestItemHistory(self, itemId, starttime=None, endtime=None, parameter="Power"):
         """
@@ -143,6 +547,137 @@ class solaredgeoptimizers:
         :return: dictionary with datetime (keys), value (values) pairs
             Note, time resolution of the result depends on the time range spanned by start- and endtime
         """
+        return self.flights.do(
+            ("history", itemId, starttime, endtime, parameter),
+            self.__RequestItemHistory, itemId, starttime, endtime, parameter,
+        )
+
+    def __RequestItemHistory(self, itemId, starttime, endtime, parameter):
+        r = self._doRequestWithCooldown("GET", self._historyUrl(itemId, starttime, endtime, parameter))
+        if r.startswith("ERROR001"):
+            raise Exception(f"Error while doing request: {r}")
+
+        return self._parseHistory(r)
+
+    def requestItemHistories(self, starttimes, endtime=None, parameter="Power", max_workers=DEFAULT_MAX_WORKERS, deadline=None, missing=None):
+        """
+        Request the measurement history of several items, logging in once for all of them
+        :param starttimes: dictionary with itemId (keys), starttime (values) as for requestItemHistory
+        :param endtime: endtime for all items, as for requestItemHistory
+        :param parameter: the measurement parameter to return
+        :param max_workers: number of items requested in parallel
+        :param deadline: time.monotonic() value by which all requests have to be done, or None
+        :param missing: list to add the itemId to of every item that failed or was not
+            requested before the deadline, or None to raise the first error instead
+        :return: dictionary with itemId (keys), history as returned by requestItemHistory (values)
+        """
+        webSession = self._getWebSession(deadline)
+
+        histories = {}
+        executor = ThreadPoolExecutor(max_workers=max(1, max_workers))
+        try:
+            futures = {
+                executor.submit(self._requestItemHistory, webSession, itemId, starttime, endtime, parameter, deadline): itemId
+                for itemId, starttime in starttimes.items()
+            }
+            try:
+                for future in as_completed(futures, timeout=self._remaining(deadline)):
+                    itemId = futures[future]
+                    try:
+                        histories[itemId] = future.result()
+                    except Exception as e:
+                        if missing is None:
+                            raise
+                        _LOGGER.debug("Failed to request the %s history of %s: %s", parameter, itemId, e)
+                        missing.append(itemId)
+            except FutureTimeoutError as e:
+                if missing is None:
+                    raise DeadlineExceeded("Deadline reached before all items were requested") from e
+                # Keep what is done by now, everything else is missing
+                for future, itemId in futures.items():
+                    if itemId in histories or itemId in missing:
+                        continue
+                    if future.done() and future.exception() is None:
+                        histories[itemId] = future.result()
+                    else:
+                        missing.append(itemId)
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+        if missing:
+            _LOGGER.warning("No %s history for %s items: %s", parameter, len(missing), missing)
+        return histories
+
+    async def arequestItemHistories(self, starttimes, endtime=None, parameter="Power", max_workers=DEFAULT_MAX_WORKERS, deadline=None, missing=None, executor=None):
+        """
+        Async variant of requestItemHistories. The login and every item are a job of their own in
+        executor, or the default executor of the loop when None
+        """
+        loop = asyncio.get_running_loop()
+        webSession = await loop.run_in_executor(executor, self._getWebSession, deadline)
+
+        jobs = [
+            (itemId, self._requestItemHistory, webSession, itemId, starttime, endtime, parameter, deadline)
+            for itemId, starttime in starttimes.items()
+        ]
+        histories = {}
+        async with aclosing(self._aiterJobs(jobs, executor, max_workers, deadline, ordered=False)) as results:
+            async for itemId, task in results:
+                if task is None:
+                    if missing is None:
+                        raise DeadlineExceeded("Deadline reached before all items were requested")
+                    missing.append(itemId)
+                    continue
+                error = task.exception()
+                if error is not None:
+                    if missing is None:
+                        raise error
+                    _LOGGER.debug("Failed to request the %s history of %s: %s", parameter, itemId, error)
+                    missing.append(itemId)
+                    continue
+                histories[itemId] = task.result()
+
+        if missing:
+            _LOGGER.warning("No %s history for %s items: %s", parameter, len(missing), missing)
+        return histories
+
+    def _requestItemHistory(self, webSession, itemId, starttime, endtime, parameter, deadline=None):
+        return self.flights.do(
+            ("history", itemId, starttime, endtime, parameter),
+            self.__RequestItemHistoryWithSession, webSession, itemId, starttime, endtime, parameter, deadline,
+            deadline=deadline,
+        )
+
+    def __RequestItemHistoryWithSession(self, webSession, itemId, starttime, endtime, parameter, deadline=None):
+        try:
+            return self.__RequestItemHistoryOnce(webSession, itemId, starttime, endtime, parameter, deadline)
+        except SessionExpired as e:
+            # Log in again once, the session is shared with the other items of the batch
+            _LOGGER.debug("Logging in again to request the history of %s: %s", itemId, e)
+            self._dropWebSession(webSession)
+            webSession = self._getWebSession(deadline)
+        try:
+            return self.__RequestItemHistoryOnce(webSession, itemId, starttime, endtime, parameter, deadline)
+        except SessionExpired:
+            self._dropWebSession(webSession)
+            raise
+
+    def __RequestItemHistoryOnce(self, webSession, itemId, starttime, endtime, parameter, deadline=None):
+        session, headers = webSession
+        # An expired login is redirected to the login page, do not follow it
+        with session.get(self._historyUrl(itemId, starttime, endtime, parameter), headers=headers,
+                         timeout=self._timeout(deadline), allow_redirects=False) as r:
+            if r.status_code in (401, 403) or r.is_redirect:
+                raise SessionExpired(f"Error while doing request: HTTP CODE: {r.status_code}")
+            if r.status_code != 200:
+                raise Exception(f"Error while doing request: HTTP CODE: {r.status_code}")
+            try:
+                return self._parseHistory(r.text)
+            except Exception as e:
+                # Usually the login page, served with 200 when the login expired
+                raise SessionExpired("Error while processing data") from e
+
+    def _historyUrl(self, itemId, starttime=None, endtime=None, parameter="Power"):
         if starttime is None:
             now = datetime.now()
             starttime = datetime(now.year, now.month, now.day)
@@ -153,19 +688,16 @@ class solaredgeoptimizers:
         if isinstance(endtime, datetime):
             endtime = int(endtime.timestamp() * 1000)
 
-        url = 'https://monitoring.solaredge.com/solaredge-web/p/chartData?reporterId={}&fieldId={}&reporterType=&startDate={:d}&endDate={:d}&uom=W&parameterName={}'.format(
-            itemId, self.siteid,
+        return '{}/solaredge-web/p/chartData?reporterId={}&fieldId={}&reporterType=&startDate={:d}&endDate={:d}&uom=W&parameterName={}'.format(
+            self.base_url, itemId, self.siteid,
             starttime, endtime, parameter
         )
 
-        r = self._doRequestWithCooldown("GET", url)
-        if r.startswith("ERROR001"):
-            raise Exception(f"Error while doing request: {r}")
-
-        json_object = self.decodeResult(r)
+    def _parseHistory(self, text):
+        json_object = self.decodeResult(text)
         try:
             # Note: the timestamp provided by SolarEdge is not a pure POSIX timestamp, but in fact contains a timezone offset.
-            return {datetime.utcfromtimestamp(pair['date']/1000).astimezone(pytz.utc): pair['value'] for pair in json_object['dateValuePairs']}
+            return {datetime.utcfromtimestamp(pair['date']/1000).astimezone(timezone.utc): pair['value'] for pair in json_object['dateValuePairs']}
         except Exception as e:
             raise Exception("Error while processing data") from e
 
@@ -225,62 +757,93 @@ class solaredgeoptimizers:
                 raise e
         raise e
 
-    def _doRequest(self, method, request_url, data=None):
+    def _login(self, session, deadline=None):
+        """
+        Log in on session
+        :return: the headers for requests with session
+        """
+        session.head(
+            "{}/solaredge-apigw/api/sites/{}/layout/energy".format(
+                self.base_url, self.siteid
+            ),
+            headers={"user-agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/105.0.0.0 Safari/537.36",
+                     },
+            timeout=self._timeout(deadline),
+        )
+
+        url = "{}/solaredge-web/p/login".format(self.base_url)
+
+        session.auth = (self.username, self.password)
+
+        # request a login url the get the correct cookie
+        r1 = session.get(url, timeout=self._timeout(deadline))
+        # AJT: 11-Jan-2026: Verify login request succeeded
+        if r1.status_code != 200:
+            _LOGGER.warning("Login request returned status %d", r1.status_code)
+
+        # Fix the cookie to get a string.
+        therightcookie = self.MakeStringFromCookie(session.cookies.get_dict())
+        # The csrf-token is needed as a seperate header.
+        thecrsftoken = self.GetThecsrfToken(session.cookies.get_dict())
+        # AJT: Added check for None CSRF token to prevent errors when token is missing
+        if thecrsftoken is None:
+            _LOGGER.warning("CSRF token not found in cookies")
+            thecrsftoken = ""
+
+        return {
+            "authority": "monitoring.solaredge.com",
+            "accept": "*/*",
+            "accept-language": "en-US,en;q=0.9,nl;q=0.8",
+            "content-type": "application/json",
+            "cookie": therightcookie,
+            "origin": "https://monitoring.solaredge.com",
+            "referer": "https://monitoring.solaredge.com/solaredge-web/p/site/{}/".format(
+                self.siteid
+            ),
+            "sec-ch-ua": '"Google Chrome";v="105", "Not)A;Brand";v="8", "Chromium";v="105"',
+            "sec-ch-ua-mobile": "?0",
+            "sec-ch-ua-platform": '"Windows"',
+            "sec-fetch-dest": "empty",
+            "sec-fetch-mode": "cors",
+            "sec-fetch-site": "same-origin",
+            "user-agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/105.0.0.0 Safari/537.36",
+            "x-csrf-token": thecrsftoken,
+            "x-kl-ajax-request": "Ajax_Request",
+            "x-requested-with": "XMLHttpRequest",
+        }
+
+    def _getWebSession(self, deadline=None):
+        """Return the logged in session shared by batched requests, and its headers"""
+        with self._webSessionLock:
+            if self._webSession is None:
+                session = Session()
+                try:
+                    headers = self._login(session, deadline)
+                except Exception:
+                    session.close()
+                    raise
+                self._webSession = (session, headers)
+            return self._webSession
+
+    def _dropWebSession(self, webSession=None):
+        """Close the shared logged in session, so the next batch logs in again"""
+        with self._webSessionLock:
+            if self._webSession is not None and webSession in (None, self._webSession):
+                self._webSession[0].close()
+                self._webSession = None
+
+    def _doRequest(self, method, request_url, data=None, deadline=None):
         # AJT: 11-Jan-2026: Fixed file descriptor leak by using context manager to ensure session is always closed
         with Session() as session:
-            session.head(
-                "https://monitoring.solaredge.com/solaredge-apigw/api/sites/{}/layout/energy".format(
-                    self.siteid
-                ),
-                headers={"user-agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/105.0.0.0 Safari/537.36",
-                         }
-            )
-
-            url = "https://monitoring.solaredge.com/solaredge-web/p/login"
-
-            session.auth = (self.username, self.password)
-
-            # request a login url the get the correct cookie
-            r1 = session.get(url)
-            # AJT: 11-Jan-2026: Verify login request succeeded
-            if r1.status_code != 200:
-                _LOGGER.warning("Login request returned status %d", r1.status_code)
-
-            # Fix the cookie to get a string.
-            therightcookie = self.MakeStringFromCookie(session.cookies.get_dict())
-            # The csrf-token is needed as a seperate header.
-            thecrsftoken = self.GetThecsrfToken(session.cookies.get_dict())
-            # AJT: Added check for None CSRF token to prevent errors when token is missing
-            if thecrsftoken is None:
-                _LOGGER.warning("CSRF token not found in cookies")
-                thecrsftoken = ""
+            headers = self._login(session, deadline)
 
             # Build up the request.
             response = session.request(
                 method=method,
                 url=request_url,
-                headers={
-                    "authority": "monitoring.solaredge.com",
-                    "accept": "*/*",
-                    "accept-language": "en-US,en;q=0.9,nl;q=0.8",
-                    "content-type": "application/json",
-                    "cookie": therightcookie,
-                    "origin": "https://monitoring.solaredge.com",
-                    "referer": "https://monitoring.solaredge.com/solaredge-web/p/site/{}/".format(
-                        self.siteid
-                    ),
-                    "sec-ch-ua": '"Google Chrome";v="105", "Not)A;Brand";v="8", "Chromium";v="105"',
-                    "sec-ch-ua-mobile": "?0",
-                    "sec-ch-ua-platform": '"Windows"',
-                    "sec-fetch-dest": "empty",
-                    "sec-fetch-mode": "cors",
-                    "sec-fetch-site": "same-origin",
-                    "user-agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/105.0.0.0 Safari/537.36",
-                    "x-csrf-token": thecrsftoken,
-                    "x-kl-ajax-request": "Ajax_Request",
-                    "x-requested-with": "XMLHttpRequest",
-                },
-                data=data
+                headers=headers,
+                data=data,
+                timeout=self._timeout(deadline),
             )
 
             if response.status_code == 200:
@@ -288,16 +851,16 @@ class solaredgeoptimizers:
             else:
                 return "ERROR001 - HTTP CODE: {}".format(response.status_code)
 
-    def getLifeTimeEnergy(self):
-        url = "https://monitoring.solaredge.com/solaredge-apigw/api/sites/{}/layout/energy?timeUnit=ALL".format(
-            self.siteid
+    def getLifeTimeEnergy(self, deadline=None):
+        url = "{}/solaredge-apigw/api/sites/{}/layout/energy?timeUnit=ALL".format(
+            self.base_url, self.siteid
         )
-        return self._doRequest("POST", url)
+        return self._doRequest("POST", url, deadline=deadline)
 
     def getAlerts(self, only_open=False):
         # Note: this might require FULL_ACCESS rights in the SE portal, as opposed to DASHBOARD_AND_LAYOUT
-        url = "https://monitoring.solaredge.com/solaredge-apigw/api/rna/v1.0/site/{}/alerts".format(
-            self.siteid
+        url = "{}/solaredge-apigw/api/rna/v1.0/site/{}/alerts".format(
+            self.base_url, self.siteid
         )
         data = None
         if only_open:
@@ -306,6 +869,28 @@ class solaredgeoptimizers:
                      "fieldValue": ["OPEN"]}]
         return self._doRequest("POST", url, data=json.dumps(data))
 
+    def requestAlerts(self, only_open=False):
+        """
+        Request the alerts of the site
+        :param only_open: True to only request the alerts with status OPEN
+        :return: list of SolarEdgeAlert
+        """
+        return self.flights.do(("alerts", only_open), self.__RequestAlerts, only_open)
+
+    def __RequestAlerts(self, only_open):
+        r = self.getAlerts(only_open=only_open)
+        if r.startswith("ERROR001"):
+            raise Exception(f"Error while doing request: {r}")
+
+        json_obj = json.loads(r)
+        if isinstance(json_obj, dict):
+            # The list of alerts can be wrapped in a (paged) response object
+            json_obj = next(
+                (json_obj[key] for key in ("alerts", "items", "content", "data") if isinstance(json_obj.get(key), list)),
+                [],
+            )
+        return [SolarEdgeAlert(alert) for alert in json_obj if isinstance(alert, dict)]
+
     def GetThecsrfToken(self, cookies):
         for cookie in cookies:
             if cookie == "CSRF-TOKEN":
@@ -337,6 +922,17 @@ class solaredgeoptimizers:
         return maincookiestring
 
     def decodeResult(self, result):
+        try:
+            # Most responses are plain JSON
+            json_result = json.loads(result)
+            if isinstance(json_result, (dict, list)):
+                return json_result
+        except ValueError:
+            pass
+
+        # Only needed to find the JSON in other responses
+        from jsonfinder import jsonfinder
+
         json_result = ""
         for _, __, obj in jsonfinder(result, json_only=True):
             json_result = obj
@@ -346,11 +942,24 @@ class solaredgeoptimizers:
 
         return json_result
 
+class SolarEdgeAllData(list):
+    """List of SolarEdgeOptimizerData, with the optimizerId of every optimizer that is missing because of a timeout"""
+
+    def __init__(self, *args):
+        super().__init__(*args)
+        self.missing = []
+
+
 class SolarEdgeSite:
     def __init__(self, json_obj):
         self.siteId = json_obj["siteId"]
+        self._logicalTree = json_obj["logicalTree"]
         self.inverters = self.__GetAllInverters(json_obj)
 
+    def toJson(self):
+        """Return the part of the logical layout needed to rebuild this SolarEdgeSite"""
+        return {"siteId": self.siteId, "logicalTree": self._logicalTree}
+
     def __GetAllInverters(self, json_obj):
 
         inverters = []
@@ -460,10 +1069,77 @@ class SolarlEdgeOptimizer:
         self.operationsKey = json_obj["data"]["operationsKey"]
 
 
+class SolarEdgeAlert:
+    """Alert of a site, as returned by the rna alerts endpoint."""
+
+    def __init__(self, json_obj):
+        self.alertId = self.__FirstOf(json_obj, "id", "alertId")
+        self.status = self.__FirstOf(json_obj, "status")
+        self.severity = self.__FirstOf(json_obj, "severity", "impact")
+        self.alertType = self.__FirstOf(json_obj, "type", "alertType", "name")
+        self.description = self.__FirstOf(json_obj, "description", "message")
+        self.reporterId = self.__FirstOf(json_obj, "reporterId", "componentId")
+        self.openedDate = self.__FirstOf(json_obj, "openedDate", "startDate", "creationDate")
+        self.lastUpdated = self.__FirstOf(json_obj, "lastUpdated", "lastUpdateDate", "updatedDate")
+        self._json_obj = json_obj
+
+    def __FirstOf(self, json_obj, *keys):
+        for key in keys:
+            if json_obj.get(key) is not None:
+                return json_obj[key]
+        return None
+
+    def key(self):
+        """
+        Return the key that identifies the alert between polls: its id, or for an alert
+        without id its type, component and start time
+        """
+        if self.alertId is not None:
+            return self.alertId
+        return ("fingerprint", json.dumps([self.alertType, self.reporterId, self.openedDate], default=str))
+
+    def fingerprint(self):
+        """Return a string that changes whenever the alert changes"""
+        if self.lastUpdated is not None:
+            return json.dumps([self.status, self.severity, self.lastUpdated], default=str)
+        return json.dumps(self._json_obj, sort_keys=True, default=str)
+
+    def toJson(self):
+        """Return the alert as returned by the portal, to rebuild this SolarEdgeAlert"""
+        return self._json_obj
+
+    def toDict(self):
+        return {
+            "alert_id": self.alertId,
+            "status": self.status,
+            "severity": self.severity,
+            "alert_type": self.alertType,
+            "description": self.description,
+            "reporter_id": self.reporterId,
+            "opened_date": self.openedDate,
+            "last_updated": self.lastUpdated,
+        }
+
+
 class SolarEdgeOptimizerData:
     """Data class for SolarEdge optimizer measurements and metadata."""
 
-    def __init__(self, paneelid, json_object):
+    # Attributes stored by toSnapshot, in order
+    SNAPSHOT_FIELDS = (
+        "paneel_id",
+        "serialnumber",
+        "paneel_description",
+        "lastmeasurement",
+        "model",
+        "manufacturer",
+        "current",
+        "optimizer_voltage",
+        "power",
+        "voltage",
+        "lifetime_energy",
+    )
+
+    def __init__(self, paneelid, json_object, locale=DEFAULT_LOCALE):
 
         # Atributen die we willen zien:
         self.serialnumber = ""
@@ -518,7 +1194,34 @@ class SolarEdgeOptimizerData:
 
             # Waarden - AJT: 11-Jan-2026: Fixed unsafe dictionary access using .get() with defaults
             measurements = json_object.get("measurements", {})
-            self.current = measurements.get("Current [A]", 0.0)
-            self.optimizer_voltage = measurements.get("Optimizer Voltage [V]", 0.0)
-            self.power = measurements.get("Power [W]", 0.0)
-            self.voltage = measurements.get("Voltage [V]", 0.0)
+            self.current = self.__ParseMeasurement(measurements, "Current [A]", locale)
+            self.optimizer_voltage = self.__ParseMeasurement(measurements, "Optimizer Voltage [V]", locale)
+            self.power = self.__ParseMeasurement(measurements, "Power [W]", locale)
+            self.voltage = self.__ParseMeasurement(measurements, "Voltage [V]", locale)
+
+    def __ParseMeasurement(self, measurements, key, locale):
+        # Numbers are normalized once here, so the sensors never have to
+        value = measurements.get(key, 0.0)
+        number = parseMeasurement(value, locale)
+        if number is None:
+            _LOGGER.warning("Could not convert value '%s' of %s to float for optimizer %s", value, key, self.paneel_id)
+        return number
+
+    def toSnapshot(self):
+        """Return the data as a compact, JSON serializable list in the order of SNAPSHOT_FIELDS"""
+        values = [getattr(self, field) for field in self.SNAPSHOT_FIELDS]
+        if isinstance(self.lastmeasurement, datetime):
+            values[self.SNAPSHOT_FIELDS.index("lastmeasurement")] = self.lastmeasurement.isoformat()
+        return values
+
+    @classmethod
+    def fromSnapshot(cls, values):
+        """Rebuild a SolarEdgeOptimizerData from a list returned by toSnapshot"""
+        data = cls(None, None)
+        for field, value in zip(cls.SNAPSHOT_FIELDS, values):
+            setattr(data, field, value)
+        if data.lastmeasurement:
+            data.lastmeasurement = datetime.fromisoformat(data.lastmeasurement)
+        for field in ("current", "optimizer_voltage", "power", "voltage"):
+            setattr(data, field, parseMeasurement(getattr(data, field)))
+        return data
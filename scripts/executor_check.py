@@ -0,0 +1,93 @@
+"""Check that the worker pool of the integration does not queue work behind running work.
+
+A long refresh job is submitted, followed right away by a short interactive job
+and a burst of short jobs. While a worker is free (or one can be started) the
+short jobs must start without waiting for the long job, and work that has to
+queue must run in order of priority.
+
+    python scripts/executor_check.py
+
+Needs Home Assistant installed, run from the root of the repository.
+"""
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from custom_components.solaredgeoptimizers.const import (  # noqa: E402
+    PRIORITY_BACKGROUND,
+    PRIORITY_INTERACTIVE,
+    PRIORITY_REFRESH,
+)
+from custom_components.solaredgeoptimizers.executor import PriorityExecutor  # noqa: E402
+
+LONG = 1.0
+# Short jobs should start well before the long job ends
+MAX_WAIT = 0.2
+
+
+def check_no_wait(errors):
+    executor = PriorityExecutor(max_workers=4)
+    # Leave a worker idle, so the next job is handed to it
+    executor.submit(time.sleep, 0).result()
+    time.sleep(0.1)
+
+    started = time.monotonic()
+    long_job = executor.submit(time.sleep, LONG)
+    # Same priority, an idle worker that takes the jobs in order runs it last
+    short_job = executor.submit(time.monotonic)
+    waited = short_job.result() - started
+    print("short job after a long job waited {:.3f} s".format(waited))
+    if waited > MAX_WAIT:
+        errors.append("a short job waited {:.3f} s behind a long job".format(waited))
+
+    burst = [executor.submit(time.monotonic) for _ in range(2)]
+    waits = [job.result() - started for job in burst]
+    print("burst of short jobs waited {}".format(", ".join("{:.3f} s".format(w) for w in waits)))
+    if max(waits) > MAX_WAIT:
+        errors.append("a burst of short jobs waited behind a long job")
+
+    long_job.result()
+    stats = executor.stats()
+    print("pool: {}".format(stats))
+    if stats["workers"] > executor.max_workers:
+        errors.append("more workers than max_workers")
+    executor.shutdown()
+
+
+def check_priority(errors):
+    executor = PriorityExecutor(max_workers=1)
+    release = threading.Event()
+    executor.submit(release.wait)
+
+    order = []
+    jobs = [
+        executor.submit(order.append, "background", priority=PRIORITY_BACKGROUND),
+        executor.submit(order.append, "refresh", priority=PRIORITY_REFRESH),
+        executor.submit(order.append, "interactive", priority=PRIORITY_INTERACTIVE),
+    ]
+    release.set()
+    for job in jobs:
+        job.result()
+    print("queued jobs ran in order {}".format(order))
+    if order != ["interactive", "refresh", "background"]:
+        errors.append("queued jobs did not run in order of priority")
+    executor.shutdown()
+
+
+def main():
+    errors = []
+    check_no_wait(errors)
+    check_priority(errors)
+
+    for error in errors:
+        print("FAIL: " + error)
+    if not errors:
+        print("OK")
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
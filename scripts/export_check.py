@@ -0,0 +1,129 @@
+"""Check the InfluxDB exporter against a local stand-in of the InfluxDB write endpoint.
+
+The stand-in rejects the first writes with 503, so the retry is exercised, and
+more batches are exported than fit in the buffer, so the back-pressure (dropping
+the oldest batch) is exercised. The MQTT payloads are only serialized.
+
+    python scripts/export_check.py
+
+Needs Home Assistant installed, run from the root of the repository.
+"""
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import threading
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from homeassistant.core import HomeAssistant  # noqa: E402
+
+from custom_components.solaredgeoptimizers import exporter  # noqa: E402
+
+FAILURES = 2
+
+
+class StandInInflux(BaseHTTPRequestHandler):
+    received = []
+    failures = FAILURES
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers["Content-Length"])).decode()
+        if StandInInflux.failures:
+            StandInInflux.failures -= 1
+            self.send_response(503)
+        else:
+            StandInInflux.received.append((self.headers.get("Authorization"), body))
+            self.send_response(204)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+
+def build_site():
+    optimizers = [SimpleNamespace(optimizerId=i, displayName="Optimizer {}".format(i)) for i in range(1, 4)]
+    string = SimpleNamespace(displayName="String 1.1", optimizers=optimizers)
+    inverter = SimpleNamespace(serialNumber="7E1234", strings=[string])
+    return SimpleNamespace(siteId=12345, inverters=[inverter])
+
+
+def build_data(minute):
+    return [
+        SimpleNamespace(
+            paneel_id=i,
+            serialnumber="SN,{}".format(i),
+            lastmeasurement=datetime(2026, 6, 1, 12, minute),
+            power=100.0 * i,
+            voltage=35.0,
+            current=None,
+            optimizer_voltage=40.0,
+            lifetime_energy=1000.0 + minute,
+        )
+        for i in range(1, 4)
+    ]
+
+
+async def check(url):
+    hass = HomeAssistant(tempfile.mkdtemp())
+    loop = asyncio.get_running_loop()
+    entry = SimpleNamespace(async_create_background_task=lambda hass, target, name: loop.create_task(target))
+    exporter.EXPORT_RETRY_DELAY = 0.05
+
+    errors = []
+    site = build_site()
+    influx = exporter.InfluxExporter(hass, entry, url, "token", buffer_size=2)
+    influx.async_start()
+    for minute in range(4):
+        influx.async_export(site, build_data(minute))
+        # Data carried over from a previous refresh is not exported again
+        influx.async_export(site, build_data(minute))
+
+    for _ in range(100):
+        if not influx.report()["buffered"]:
+            break
+        await asyncio.sleep(0.05)
+
+    report = influx.report()
+    print("InfluxDB exporter: {}".format(report))
+    if report != {"batches": 2, "messages": 2, "retries": FAILURES, "rejected": 0, "dropped": 2, "buffered": 0}:
+        errors.append("unexpected InfluxDB exporter statistics")
+    if [auth for auth, _ in StandInInflux.received] != ["Token token"] * 2:
+        errors.append("missing authorization header")
+    lines = [line for _, body in StandInInflux.received for line in body.splitlines()]
+    if len(lines) != 6 or not all(line.startswith("solaredge_optimizer,site=12345,optimizer=SN\\,") for line in lines):
+        errors.append("unexpected line protocol: {}".format(lines))
+
+    mqtt = exporter.MqttExporter(hass, entry, "solaredge/")
+    messages = mqtt.serialize(site, build_data(0))
+    print("MQTT messages: {}".format(messages))
+    if len(messages) != 1 or messages[0][0] != "solaredge/7E1234" or len(json.loads(messages[0][1])["optimizers"]) != 3:
+        errors.append("unexpected MQTT messages")
+
+    await hass.async_stop(force=True)
+    return errors
+
+
+def main():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StandInInflux)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        errors = asyncio.run(check("http://127.0.0.1:{}/api/v2/write?bucket=solar&precision=s".format(server.server_address[1])))
+    finally:
+        server.shutdown()
+
+    for error in errors:
+        print("FAIL: " + error)
+    if not errors:
+        print("OK")
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,116 @@
+"""Measure the import time of the integration and of the SolarEdge client.
+
+Every measurement runs in a fresh interpreter. Home Assistant itself is imported
+first (it is always loaded before the integration), so only the cost of the
+integration and the libraries it pulls in is measured.
+
+    python scripts/import_benchmark.py --runs 10 --details
+
+Use --budget to fail (exit code 1) when the median import time of the
+integration exceeds the given number of milliseconds.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+CLIENT_DIR = os.path.join(ROOT, "custom_components", "solaredgeoptimizers")
+
+# Modules that are already loaded when Home Assistant sets up an integration
+PRELOADED = (
+    "homeassistant.core",
+    "homeassistant.config_entries",
+    "homeassistant.helpers.update_coordinator",
+    "homeassistant.helpers.storage",
+    "homeassistant.helpers.aiohttp_client",
+    "homeassistant.components.sensor",
+    "homeassistant.components.binary_sensor",
+    "homeassistant.components.diagnostics",
+    "requests",
+)
+
+TARGETS = {
+    # name: (modules to import, sys.path entry, preload Home Assistant)
+    "integration": (
+        (
+            "custom_components.solaredgeoptimizers",
+            "custom_components.solaredgeoptimizers.sensor",
+            "custom_components.solaredgeoptimizers.binary_sensor",
+        ),
+        ROOT,
+        True,
+    ),
+    "client": (("solaredgeoptimizers",), CLIENT_DIR, False),
+}
+
+MARKER = "--- import_benchmark ---"
+
+
+def script(modules, path, preload):
+    lines = ["import sys, time", "sys.path.insert(0, {!r})".format(path)]
+    if preload:
+        lines += ["import {}".format(module) for module in PRELOADED]
+    lines += [
+        "sys.stderr.write({!r} + '\\n')".format(MARKER),
+        "start = time.perf_counter()",
+    ]
+    lines += ["import {}".format(module) for module in modules]
+    lines += ["print(time.perf_counter() - start)"]
+    return "\n".join(lines)
+
+
+def measure(modules, path, preload):
+    """Return the import time in ms, in a fresh interpreter."""
+    result = subprocess.run(
+        [sys.executable, "-c", script(modules, path, preload)],
+        capture_output=True, text=True, check=True,
+    )
+    return float(result.stdout.strip()) * 1000
+
+
+def details(modules, path, preload, top):
+    """Return the modules with the highest self time (ms), from -X importtime."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", script(modules, path, preload)],
+        capture_output=True, text=True, check=True,
+    )
+    stderr = result.stderr.split(MARKER, 1)[-1]
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        rows.append((int(self_us) / 1000, int(cumulative_us) / 1000, name.strip()))
+    return sorted(rows, reverse=True)[:top]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--details", action="store_true", help="show the slowest modules")
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--budget", type=float, help="maximum median import time of the integration (ms)")
+    args = parser.parse_args(argv)
+
+    medians = {}
+    for name, (modules, path, preload) in TARGETS.items():
+        times = [measure(modules, path, preload) for _ in range(args.runs)]
+        medians[name] = statistics.median(times)
+        print("{:<12} median {:8.1f} ms  min {:8.1f} ms  max {:8.1f} ms".format(
+            name, medians[name], min(times), max(times)))
+
+        if args.details:
+            for self_ms, cumulative_ms, module in details(modules, path, preload, args.top):
+                print("    {:8.1f} ms self {:8.1f} ms cumulative  {}".format(self_ms, cumulative_ms, module))
+
+    if args.budget is not None and medians["integration"] > args.budget:
+        print("FAIL: the integration takes {:.1f} ms to import, the budget is {:.1f} ms".format(
+            medians["integration"], args.budget))
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
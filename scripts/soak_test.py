@@ -0,0 +1,322 @@
+"""Soak test of the refresh cycle against a local stand-in of the SolarEdge portal.
+
+Runs the same requests as a coordinator refresh (logical layout, lifetime energy
+and the system data of every optimizer, streamed with a deadline) thousands of
+times. The stand-in portal runs in a separate process and mixes in slow responses,
+connection resets, 5xx errors and malformed bodies. After every cycle the RSS, the
+number of open file descriptors, the number of threads and the cycle latency are
+sampled; the test fails when any of them keeps growing after the warm-up.
+
+    python scripts/soak_test.py --cycles 2000 --csv soak.csv
+
+Linux only (uses /proc). Needs the requirements of the client, requests and
+jsonfinder (loaded for the malformed bodies), not Home Assistant.
+"""
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import argparse
+import asyncio
+import csv
+import gc
+import json
+import multiprocessing
+import os
+import random
+import socket
+import statistics
+import struct
+import sys
+import time
+
+sys.path.insert(
+    0,
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "custom_components", "solaredgeoptimizers"),
+)
+
+from solaredgeoptimizers import solaredgeoptimizers  # noqa: E402
+
+SITE_ID = 12345
+FAULTS = ("slow", "reset", "error", "malformed")
+
+
+def build_layout(inverters, strings, optimizers):
+    def node(item_id, name, children=()):
+        return {
+            "data": {
+                "id": item_id,
+                "serialNumber": "SN{}".format(item_id),
+                "name": name,
+                "displayName": name,
+                "relativeOrder": 1,
+                "type": "TYPE",
+                "operationsKey": 0,
+            },
+            "childIds": [child["data"]["id"] for child in children],
+            "children": list(children),
+        }
+
+    inverter_nodes = []
+    next_id = 1000
+    for i in range(inverters):
+        string_nodes = []
+        for s in range(strings):
+            optimizer_nodes = []
+            for _ in range(optimizers):
+                next_id += 1
+                optimizer_nodes.append(node(next_id, "Optimizer {}".format(next_id)))
+            next_id += 1
+            string_nodes.append(node(next_id, "String {}.{}".format(i + 1, s + 1), optimizer_nodes))
+        next_id += 1
+        inverter_nodes.append(node(next_id, "Inverter {}".format(i + 1), string_nodes))
+
+    return {"siteId": SITE_ID, "logicalTree": node(SITE_ID, "Site", inverter_nodes)}
+
+
+def optimizer_ids(layout):
+    return [
+        optimizer["data"]["id"]
+        for inverter in layout["logicalTree"]["children"]
+        for string in inverter["children"]
+        for optimizer in string["children"]
+    ]
+
+
+class StandInPortal(BaseHTTPRequestHandler):
+    """Answers the portal requests the client makes, with random faults"""
+
+    protocol_version = "HTTP/1.1"
+    layout = None
+    fault_rate = 0.0
+    slow_delay = 0.0
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_HEAD(self):
+        self._send(200, b"")
+
+    def do_GET(self):
+        self._handle()
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        if length:
+            self.rfile.read(length)
+        self._handle()
+
+    def _handle(self):
+        url = urlparse(self.path)
+        fault = self._fault()
+        if fault == "slow":
+            time.sleep(self.slow_delay)
+        elif fault == "reset":
+            # Close with RST instead of FIN
+            self.connection.setsockopt(socket.SOL_SOCKET, socket.SO_LINGER, struct.pack("ii", 1, 0))
+            self.close_connection = True
+            self.connection.close()
+            return
+        elif fault == "error":
+            self._send(random.choice((500, 502, 503)), b"Internal error")
+            return
+        elif fault == "malformed":
+            self._send(200, b"<html><body>{\"serialNumber\": ")
+            return
+
+        if url.path.endswith("/layout/logical"):
+            body = json.dumps(self.layout)
+        elif url.path.endswith("/layout/energy"):
+            body = json.dumps({
+                str(optimizer_id): {"unscaledEnergy": random.uniform(1e5, 1e6)}
+                for optimizer_id in optimizer_ids(self.layout)
+            })
+        elif url.path.endswith("/p/login"):
+            self._send(200, b"", cookies=("CSRF-TOKEN=token; Path=/", "JSESSIONID=session; Path=/"))
+            return
+        elif url.path.endswith("/p/systemData"):
+            reporter = parse_qs(url.query)["reporterId"][0]
+            body = json.dumps({
+                "serialNumber": "SN{}".format(reporter),
+                "description": "Optimizer {}".format(reporter),
+                "lastMeasurementDate": time.strftime("%a %b %d %H:%M:%S GMT %Y", time.gmtime()),
+                "model": "P370",
+                "manufacturer": "SolarEdge",
+                "measurements": {
+                    "Current [A]": "{:.2f}".format(random.uniform(0, 10)),
+                    "Optimizer Voltage [V]": "{:.2f}".format(random.uniform(0, 60)),
+                    "Power [W]": "{:,.2f}".format(random.uniform(0, 1200)),
+                    "Voltage [V]": "{:.2f}".format(random.uniform(0, 40)),
+                },
+            })
+        else:
+            self._send(404, b"Not found")
+            return
+
+        self._send(200, body.encode())
+
+    def _fault(self):
+        if random.random() < self.fault_rate:
+            return random.choice(FAULTS)
+        return None
+
+    def _send(self, status, body, cookies=()):
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for cookie in cookies:
+            self.send_header("Set-Cookie", cookie)
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class QuietServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # Resets and clients that gave up are part of the test
+        pass
+
+
+def run_portal(port_queue, layout, fault_rate, slow_delay):
+    StandInPortal.layout = layout
+    StandInPortal.fault_rate = fault_rate
+    StandInPortal.slow_delay = slow_delay
+    server = QuietServer(("127.0.0.1", 0), StandInPortal)
+    port_queue.put(server.server_address[1])
+    server.serve_forever()
+
+
+def sample():
+    """Return (rss in MB, open fds, threads) of this process"""
+    gc.collect()
+    with open("/proc/self/statm") as f:
+        rss = int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    fds = len(os.listdir("/proc/self/fd"))
+    with open("/proc/self/status") as f:
+        threads = next(int(line.split()[1]) for line in f if line.startswith("Threads:"))
+    return rss, fds, threads
+
+
+async def refresh(api, deadline_sec, workers):
+    """The requests of one coordinator refresh, return (optimizers, missing)"""
+    loop = asyncio.get_running_loop()
+    deadline = time.monotonic() + deadline_sec
+    site = await loop.run_in_executor(None, api.requestListOfAllPanels, deadline)
+    missing = []
+    data = [
+        info
+        async for info in api.aiterAllData(
+            max_workers=workers, solarsite=site, deadline=deadline, missing=missing
+        )
+    ]
+    return len(data), len(missing)
+
+
+def check_growth(name, values, warmup, limit, relative=None):
+    """Compare the median of the first and last window after the warm-up, return an error or None"""
+    values = values[warmup:]
+    window = max(5, len(values) // 10)
+    if len(values) < 2 * window:
+        return None
+    first = statistics.median(values[:window])
+    last = statistics.median(values[-window:])
+    growth = last - first
+    print("{:<10} first {:>10.3f}  last {:>10.3f}  growth {:>+10.3f}  (limit {})".format(name, first, last, growth, limit))
+    if growth > limit and (relative is None or last > first * relative):
+        return "{} grew from {:.3f} to {:.3f}".format(name, first, last)
+    return None
+
+
+async def soak(args, base_url):
+    api = solaredgeoptimizers(
+        SITE_ID, "user", "password", timeout=(args.connect_timeout, args.read_timeout), base_url=base_url
+    )
+    samples = []
+    outcomes = {"ok": 0, "partial": 0, "failed": 0}
+    writer = None
+    if args.csv:
+        csv_file = open(args.csv, "w", newline="")
+        writer = csv.writer(csv_file)
+        writer.writerow(("cycle", "latency", "rss_mb", "fds", "threads", "optimizers", "missing", "error"))
+
+    try:
+        for cycle in range(args.cycles):
+            start = time.monotonic()
+            error = ""
+            optimizers = missing = 0
+            try:
+                optimizers, missing = await refresh(api, args.deadline, args.workers)
+                outcomes["partial" if missing else "ok"] += 1
+            except Exception as e:
+                outcomes["failed"] += 1
+                error = type(e).__name__
+            latency = time.monotonic() - start
+
+            rss, fds, threads = sample()
+            samples.append((latency, rss, fds, threads))
+            if writer:
+                writer.writerow((cycle, round(latency, 4), round(rss, 2), fds, threads, optimizers, missing, error))
+            if (cycle + 1) % args.report_every == 0:
+                print("cycle {:>6}  latency {:6.3f}s  rss {:7.1f} MB  fds {:4}  threads {:3}  {}".format(
+                    cycle + 1, latency, rss, fds, threads, outcomes))
+    finally:
+        api.close()
+        if writer:
+            csv_file.close()
+
+    return samples, outcomes
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--cycles", type=int, default=2000)
+    parser.add_argument("--inverters", type=int, default=2)
+    parser.add_argument("--strings", type=int, default=2)
+    parser.add_argument("--optimizers", type=int, default=8, help="optimizers per string")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--fault-rate", type=float, default=0.01, help="chance of a fault per request")
+    parser.add_argument("--slow-delay", type=float, default=1.5, help="delay of a slow response (s)")
+    parser.add_argument("--connect-timeout", type=float, default=1.0)
+    parser.add_argument("--read-timeout", type=float, default=1.0)
+    parser.add_argument("--deadline", type=float, default=5.0, help="deadline of a refresh (s)")
+    parser.add_argument("--warmup", type=float, default=0.1, help="fraction of the cycles ignored")
+    parser.add_argument("--rss-limit", type=float, default=32.0, help="allowed RSS growth (MB)")
+    parser.add_argument("--fd-limit", type=int, default=8, help="allowed growth of open fds")
+    parser.add_argument("--thread-limit", type=int, default=4, help="allowed growth of threads")
+    parser.add_argument("--latency-limit", type=float, default=0.5, help="allowed latency growth (s), and at least 2x")
+    parser.add_argument("--report-every", type=int, default=100)
+    parser.add_argument("--csv", help="write the samples of every cycle to this file")
+    args = parser.parse_args(argv)
+
+    layout = build_layout(args.inverters, args.strings, args.optimizers)
+    port_queue = multiprocessing.Queue()
+    portal = multiprocessing.Process(
+        target=run_portal, args=(port_queue, layout, args.fault_rate, args.slow_delay), daemon=True
+    )
+    portal.start()
+    try:
+        base_url = "http://127.0.0.1:{}".format(port_queue.get(timeout=10))
+        samples, outcomes = asyncio.run(soak(args, base_url))
+    finally:
+        portal.terminate()
+        portal.join()
+
+    print("Cycles: {}".format(outcomes))
+    warmup = int(len(samples) * args.warmup)
+    latency, rss, fds, threads = (list(values) for values in zip(*samples))
+    errors = [
+        check_growth("rss_mb", rss, warmup, args.rss_limit),
+        check_growth("fds", fds, warmup, args.fd_limit),
+        check_growth("threads", threads, warmup, args.thread_limit),
+        check_growth("latency", latency, warmup, args.latency_limit, relative=2.0),
+    ]
+    errors = [error for error in errors if error]
+    for error in errors:
+        print("FAIL: " + error)
+    if not errors:
+        print("OK: no unbounded growth")
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())